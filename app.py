@@ -1,429 +1,630 @@
-from flask import Flask, render_template, request, redirect, jsonify, flash, url_for
-from parsers.syllabus_parser import parse_syllabus_pdf
-from db.connection import get_db_connection
+from flask import Blueprint, Flask, Response, current_app, render_template, request, redirect, jsonify, flash, url_for, make_response, session, stream_with_context
+from jobs.parse_queue import get_parse_queue, shutdown_parse_queue, QueueFullError
+from parsers.upload_cache import save_upload, get_parse_cache
+from parsers.layout_templates import LAYOUT_CONFIG, configure_layouts, get_layout_registry
+from db.connection import DB_CONFIG, POOL_CONFIG, close_pool, configure_db, get_db_connection, pool_stats
+from db.courses import list_courses_page
+from db.search import search
+from db.course_tree import load_course_tree
+from db.tree_cache import get_tree_cache
+from db.write_behind import get_topic_buffer, shutdown_topic_buffer
+from db import backup, course_sync, mutations, versions
+from db.mutations import MutationError
+from monitoring import metrics
+from assets.manifest import asset_url, get_asset_manifest
+from monitoring.profiling import PROFILE_CONFIG, ProfilingMiddleware
+import io
 import os
+import secrets
+import time
 
-app = Flask(__name__)
-# REQUIRED: Add a secret key for flash messages to work
-app.secret_key = "your-random-secret-key-123!" # Changed this for you
-UPLOAD_FOLDER = "static/uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+bp = Blueprint("main", __name__)
 
-@app.route("/")
+
+def load_config(overrides=None):
+    """
+    App settings from the environment. `overrides` (same keys) wins, e.g.
+    create_app({"UPLOAD_FOLDER": "/srv/uploads", "DB_POOL": {"size": 10}}).
+    DB and DB_POOL take the keys of DB_CONFIG / POOL_CONFIG in db/connection.py,
+    LAYOUT_TEMPLATES those of LAYOUT_CONFIG in parsers/layout_templates.py.
+    """
+    overrides = overrides or {}
+    config = {
+        # Flash messages live in the signed session cookie; every worker must share the key
+        "SECRET_KEY": os.environ.get("SECRET_KEY"),
+        "UPLOAD_FOLDER": os.environ.get("UPLOAD_FOLDER", "static/uploads"),
+        "PROFILE_TOKEN": PROFILE_CONFIG["token"],
+        "DB": dict(DB_CONFIG),
+        "DB_POOL": {k: v for k, v in POOL_CONFIG.items() if k != "wrap_cursor"},
+        "LAYOUT_TEMPLATES": dict(LAYOUT_CONFIG),
+    }
+    for key, value in overrides.items():
+        if key in ("DB", "DB_POOL", "LAYOUT_TEMPLATES"):
+            config[key] = {**config[key], **value}
+        else:
+            config[key] = value
+    return config
+
+
+def create_app(config=None):
+    """
+    Builds the Flask app. `config` overrides the environment (see load_config()).
+
+    Nothing here opens a DB connection or starts a thread: the pool and the
+    parse queue are created on first use, so a server that forks workers
+    after loading the app (gunicorn --preload) gets fresh ones in each worker.
+    """
+    config = load_config(config)
+    if not config["SECRET_KEY"]:
+        # Fine for a single dev process; with several workers (or after a
+        # restart) sessions signed by another key are rejected.
+        print("WARNING: SECRET_KEY is not set; using a random key for this process.")
+        config["SECRET_KEY"] = secrets.token_hex(32)
+
+    app = Flask(__name__)
+    app.config.update(config)
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    configure_db(app.config["DB"], app.config["DB_POOL"])
+    configure_layouts(app.config["LAYOUT_TEMPLATES"])
+    app.register_blueprint(bp)
+
+    # Opt-in per-request profiling; not installed at all without PROFILE_TOKEN
+    if app.config["PROFILE_TOKEN"]:
+        app.wsgi_app = ProfilingMiddleware(app.wsgi_app, app.config["PROFILE_TOKEN"], PROFILE_CONFIG["directory"])
+    return app
+
+
+def shutdown():
+    """
+    Called once per worker on the way out (see gunicorn.conf.py): writes
+    buffered topic stats, lets queued and running parse jobs finish, then
+    closes pooled connections.
+    """
+    shutdown_topic_buffer()
+    shutdown_parse_queue(wait=True)
+    close_pool()
+
+# Part of every ETag, so a restart (and any template change it ships)
+# never answers 304 for a page rendered by an older build.
+BUILD_ID = os.environ.get("APP_BUILD_ID") or format(int(time.time()), "x")
+
+def _etag(kind, key, version):
+    return f"{kind}-{key}-v{version}-{BUILD_ID}"
+
+def _not_modified(etag):
+    """
+    A 304 response if the client's If-None-Match already has `etag`, else None.
+    Pages with a pending flash message are always rendered, so the message isn't lost.
+    """
+    if session.get("_flashes") or not request.if_none_match.contains(etag):
+        return None
+    response = current_app.response_class(status=304)
+    return _cache_headers(response, etag)
+
+def _cache_headers(response, etag):
+    response.set_etag(etag)
+    # Cache it, but revalidate with the ETag on every view
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+@bp.before_app_request
+def _start_request_metrics():
+    metrics.start_request()
+    # Label by route pattern (/dashboard/<int:course_id>), not by URL
+    metrics.set_route(request.url_rule.rule if request.url_rule else "unmatched")
+
+@bp.after_app_request
+def _record_response_status(response):
+    metrics.set_status(response.status_code)
+    return response
+
+# Teardown also runs when a view raised, which skips after_request
+@bp.teardown_app_request
+def _finish_request_metrics(exc):
+    metrics.finish_request(request.method)
+
+@bp.app_context_processor
+def _template_helpers():
+    return {"asset_url": asset_url}
+
+@bp.route("/")
 def home():
-    db = None
-    cursor = None
     courses = [] # Default to an empty list
+    next_after = None
+    etag = None
+    # Keyset pagination: `after` is the token of the previous page's last course
+    after = request.args.get("after") or None
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True) # Use dictionary=True to access columns by name
-        
-        # --- NEW SQL QUERY ---
-        # Calculates the average completion percentage for each course
-        sql = """
-            SELECT
-                C.course_id,
-                C.COURSE_NAME,
-                C.course_code,
-                COALESCE(AVG(T.completion_status), 0) AS completion_percentage
-            FROM
-                Course C
-            LEFT JOIN
-                Module M ON C.course_id = M.course_id
-            LEFT JOIN
-                Topics T ON M.module_id = T.module_id
-            GROUP BY
-                C.course_id, C.COURSE_NAME, C.course_code
-            ORDER BY
-                C.COURSE_NAME;
-        """
-        cursor.execute(sql)
-        courses = cursor.fetchall()
-        
+        with get_db_connection() as db, db.cursor(dictionary=True) as cursor: # Use dictionary=True to access columns by name
+            # The list only changes when a write bumps its version (db/versions.py)
+            # or a topic update is buffered in this process (db/write_behind.py)
+            topic_buffer = get_topic_buffer()
+            version = f"{versions.get_version(cursor, versions.COURSE_LIST)}{topic_buffer.etag_tag()}"
+            etag = _etag("courses", after or "first", version)
+            not_modified = _not_modified(etag)
+            if not_modified:
+                return not_modified
+
+            # Completion comes from the rollup tables (see db/courses.py)
+            courses, next_after = list_courses_page(cursor, after)
+            courses = topic_buffer.overlay_courses(courses)
+
+    except ValueError:
+        # Malformed page token: start over from the first page
+        return redirect(url_for('main.home'))
     except Exception as e:
         print(f"Error fetching courses: {e}") # Log the error
         flash(f"Database Error: Could not fetch courses. {e}", "error")
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
-        
+        etag = None
+
     # Pass the list of courses (which now includes 'completion_percentage')
-    return render_template("upload.html", courses=courses)
+    response = make_response(render_template("upload.html", courses=courses,
+                                              after=after, next_after=next_after))
+    return _cache_headers(response, etag) if etag else response
 
-@app.route("/upload", methods=["POST"])
+@bp.route("/upload", methods=["POST"])
 def upload_pdf():
+    # The upload page submits with fetch() and polls /jobs/<id>;
+    # a plain form post (no JS) still gets a redirect + flash message.
+    wants_json = request.accept_mimetypes.best == "application/json"
+
+    def fail(message, status):
+        if wants_json:
+            return jsonify({"error": message}), status
+        flash(message, "error")
+        return redirect(url_for('main.home'))
+
     if 'file' not in request.files:
-        flash("No file part in request.", "error")
-        return redirect(url_for('home'))
-        
+        return fail("No file part in request.", 400)
+
     file = request.files['file']
     if file.filename == '':
-        flash("No file selected for upload.", "error")
-        return redirect(url_for('home'))
+        return fail("No file selected for upload.", 400)
 
     if file:
-        path = os.path.join(UPLOAD_FOLDER, file.filename)
-        file.save(path)
-        
-        course_id = None # Initialize
+        # --- Queue the parse instead of running it in this request ---
+        queue = get_parse_queue()
+        path = None
         try:
-            course_id = parse_syllabus_pdf(path)
-        except Exception as e:
-            print(f"CRITICAL PARSER ERROR: {e}")
-            flash(f"A critical error occurred during parsing: {e}", "error")
-            return redirect(url_for('home'))
-
-        if course_id:
-            flash("Syllabus uploaded and parsed successfully!", "success")
-            return redirect(url_for('dashboard', course_id=course_id))
-        else:
-            flash("Failed to parse the PDF. Please check the file and try again.", "error")
-            return redirect(url_for('home'))
+            # Refuse before storing anything: a rejected upload leaves no file behind
+            queue.check_capacity()
+            # Stored as <sha256>.pdf; identical PDFs reuse the cached parse
+            content_hash, path = save_upload(file.stream, current_app.config["UPLOAD_FOLDER"])
+            job = queue.submit(path, file.filename, content_hash)
+        except QueueFullError as e:
+            # Another upload took the last slot while this one was stored
+            if path is not None and not queue.is_pending(path) and os.path.exists(path):
+                os.remove(path)
+            return fail(str(e), 429)
+
+        if wants_json:
+            return jsonify({
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": url_for('main.job_status', job_id=job.id),
+            }), 202
+
+        flash("Syllabus queued for processing. It will appear in your courses shortly.", "success")
+        return redirect(url_for('main.home'))
+
+@bp.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Status of a background parse job: queued / running / done / failed."""
+    job = get_parse_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    if job["status"] == "done":
+        job["dashboard_url"] = url_for('main.dashboard', course_id=job["course_id"])
+    return jsonify(job)
+
+def _course_tree(db, course_id, version, topic_buffer):
+    """
+    (course, module_data) from the tree cache while the version is unchanged,
+    else course + all modules/topics in two queries (see db/course_tree.py).
+    Topic stats not written yet (write-behind mode) are applied on top.
+    """
+    tree_cache = get_tree_cache()
+    cached = tree_cache.get(course_id, version)
+    if cached:
+        course, module_data = cached
+    else:
+        course, module_data = load_course_tree(db, course_id)
+        if course:
+            tree_cache.put(course_id, version, course, module_data)
+    return course, topic_buffer.overlay_tree(course_id, module_data)
 
-@app.route("/dashboard/<int:course_id>")
+@bp.route("/dashboard/<int:course_id>")
 def dashboard(course_id):
-    db = get_db_connection()
-    cursor = db.cursor(dictionary=True)
     course = None
     module_data = []
 
     try:
-        cursor.execute("SELECT * FROM Course WHERE course_id = %s", (course_id,))
-        course = cursor.fetchone()
+        with get_db_connection() as db:
+            # Cheap version check first: an unchanged course is a 304 with no tree load
+            with db.cursor() as cursor:
+                version = versions.get_version(cursor, course_id)
+            topic_buffer = get_topic_buffer()
+            etag = _etag("course", course_id, f"{version}{topic_buffer.etag_tag(course_id)}")
+            not_modified = _not_modified(etag)
+            if not_modified:
+                return not_modified
+
+            course, module_data = _course_tree(db, course_id, version, topic_buffer)
 
         if not course:
              flash(f"No course found with ID {course_id}.", "error")
-             return redirect(url_for('home'))
-
-        cursor.execute("SELECT * FROM Module WHERE course_id = %s ORDER BY module_id", (course_id,))
-        modules = cursor.fetchall()
+             return redirect(url_for('main.home'))
 
-        for m in modules:
-            cursor.execute("SELECT * FROM Topics WHERE module_id = %s ORDER BY topic_id", (m['module_id'],))
-            topics = cursor.fetchall()
-            module_data.append({"module": m, "topics": topics})
-            
     except Exception as e:
         print(f"Error loading dashboard: {e}")
         flash(f"Error loading dashboard data: {e}", "error")
-        return redirect(url_for('home'))
-    finally:
-        cursor.close()
-        db.close()
-        
-    return render_template("dashboard.html", course=course, module_data=module_data)
+        return redirect(url_for('main.home'))
+
+    response = make_response(render_template("dashboard.html", course=course, module_data=module_data))
+    return _cache_headers(response, etag)
 
 # --- NEW ROUTE FOR ADDING A CUSTOM COURSE ---
 
-@app.route('/add_course', methods=['POST'])
+@bp.route('/add_course', methods=['POST'])
 def add_course():
     """
     Creates a new, blank course from the form on the home page.
     """
-    db = None
-    cursor = None
     try:
         course_name = request.form.get('course_name')
         course_code = request.form.get('course_code')
 
-        if not course_name or not course_code:
-            flash("Course name and code are required.", "error")
-            return redirect(url_for('home'))
-
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        cursor.execute(
-            "INSERT INTO Course (COURSE_NAME, course_code) VALUES (%s, %s)",
-            (course_name, course_code)
-        )
-        course_id = cursor.lastrowid # Get the ID of the new course
-        db.commit()
-        
+        with get_db_connection() as db, db.cursor() as cursor:
+            course_id = mutations.add_course(cursor, course_name, course_code)["course_id"]
+            db.commit()
+
         flash(f"New course '{course_name}' created! Add modules and topics.", "success")
         # Redirect the user straight to the dashboard for their new course
-        return redirect(url_for('dashboard', course_id=course_id))
+        return redirect(url_for('main.dashboard', course_id=course_id))
 
+    except MutationError as e:
+        flash(str(e), "error")
+        return redirect(url_for('main.home'))
     except Exception as e:
-        if db: db.rollback()
         print(f"Error creating course: {e}")
         flash(f"Error creating course: {e}", "error")
-        return redirect(url_for('home'))
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
+        return redirect(url_for('main.home'))
 
 # --- COURSE MANAGEMENT ROUTES (CALLED FROM HOME) ---
 
-@app.route('/update_course/<int:course_id>', methods=['POST'])
+@bp.route('/update_course/<int:course_id>', methods=['POST'])
 def update_course(course_id):
     """
     Updates the course name and code from the home page.
     """
-    db = None
-    cursor = None
     try:
         new_name = request.form.get('course_name')
         new_code = request.form.get('course_code')
-        
-        if not new_name or not new_code:
-            flash("Course name and code cannot be empty.", "error")
-            return redirect(url_for('home')) # Redirect to home
-
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        cursor.execute(
-            "UPDATE Course SET COURSE_NAME = %s, course_code = %s WHERE course_id = %s",
-            (new_name, new_code, course_id)
-        )
-        db.commit()
+
+        with get_db_connection() as db, db.cursor() as cursor:
+            mutations.update_course(cursor, course_id, new_name, new_code)
+            db.commit()
         flash("Course details updated successfully!", "success")
-        
+
+    except MutationError as e:
+        flash(str(e), "error")
     except Exception as e:
-        if db: db.rollback()
         print(f"Error updating course: {e}")
         flash(f"Error updating course: {e}", "error")
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
-        
+
     # Redirect back to the home page to see the change
-    return redirect(url_for('home'))
+    return redirect(url_for('main.home'))
 
-@app.route('/delete_course/<int:course_id>', methods=['POST'])
+@bp.route('/delete_course/<int:course_id>', methods=['POST'])
 def delete_course(course_id):
     """
     Deletes a course from the home page.
     """
-    db = None
-    cursor = None
     try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        cursor.execute(
-            "DELETE FROM Course WHERE course_id = %s",
-            (course_id,)
-        )
-        db.commit()
+        with get_db_connection() as db, db.cursor() as cursor:
+            mutations.delete_course(cursor, course_id)
+            db.commit()
         flash(f"Course successfully deleted.", "success")
-        
+
     except Exception as e:
-        if db: db.rollback()
         print(f"Error deleting course: {e}")
         flash(f"Error deleting course: {e}", "error")
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
 
     # After deleting, send the user back to the home page
-    return redirect(url_for('home'))
+    return redirect(url_for('main.home'))
 
-# --- MODULE & TOPIC ROUTES (CALLED FROM DASHBOARD) ---
+@bp.route('/clone_course/<int:course_id>', methods=['POST'])
+def clone_course(course_id):
+    """
+    Copies a course with all its modules and topics (server-side, one
+    transaction), optionally under a new name and with progress reset.
+    """
+    try:
+        with get_db_connection() as db, db.cursor() as cursor:
+            new_id = mutations.clone_course(cursor, course_id, request.form.get('course_name'),
+                                            reset_progress=bool(request.form.get('reset_progress')))["course_id"]
+            db.commit()
+        flash("Course copied! This copy is yours to track.", "success")
+        return redirect(url_for('main.dashboard', course_id=new_id))
+
+    except MutationError as e:
+        flash(str(e), "error")
+    except Exception as e:
+        print(f"Error cloning course: {e}")
+        flash(f"Error cloning course: {e}", "error")
+    return redirect(url_for('main.home'))
 
-@app.route("/update_topic_stats/<int:topic_id>", methods=["POST"])
-def update_topic_stats(topic_id):
-    completion = request.form.get("completion")
-    importance = request.form.get("importance")
-    db = get_db_connection()
-    cursor = db.cursor()
+@bp.route('/export')
+def export_courses():
+    """
+    Streams courses as NDJSON (see db/backup.py), one line per row as it is read:
+
+        GET /export                  every course
+        GET /export?course=3         one course (repeat `course` for several)
+    """
+    course_ids = request.args.getlist("course", type=int)
+
+    def generate():
+        with get_db_connection() as db, db.cursor(dictionary=True) as cursor:
+            yield from backup.export_lines(cursor, course_ids)
+
+    filename = f"course-{course_ids[0]}.ndjson" if len(course_ids) == 1 else "courses.ndjson"
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@bp.route('/import', methods=['POST'])
+def import_courses():
+    """
+    Creates courses from an NDJSON export, read line by line: either the
+    request body itself (Content-Type: application/x-ndjson, answers JSON)
+    or a `file` uploaded from the home page form.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
     try:
-        cursor.execute("UPDATE Topics SET completion_status=%s, importance=%s WHERE topic_id=%s",
-                       (completion, importance, topic_id))
-        db.commit()
+        with get_db_connection() as db:
+            course_ids = backup.import_lines(db, io.TextIOWrapper(stream, encoding="utf-8"))
+    except backup.BackupFormatError as e:
+        message = f"Import stopped at {e}. {len(e.imported)} course(s) before it were imported."
+        if not upload:
+            return jsonify({"error": str(e), "imported": e.imported}), 400
+        flash(message, "error")
+        return redirect(url_for('main.home'))
     except Exception as e:
-        db.rollback()
-        return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        db.close()
-        
-    return jsonify({"message": "Updated successfully!"})
+        print(f"Error importing courses: {e}")
+        if not upload:
+            return jsonify({"error": str(e)}), 500
+        flash(f"Error importing courses: {e}", "error")
+        return redirect(url_for('main.home'))
 
-@app.route('/update_module/<int:module_id>', methods=['POST'])
-def update_module(module_id):
-    db = None
-    cursor = None
+    if not upload:
+        return jsonify({"imported": course_ids}), 201
+    flash(f"Imported {len(course_ids)} course(s).", "success")
+    return redirect(url_for('main.home'))
+
+# --- MODULE & TOPIC ROUTES (CALLED FROM DASHBOARD) ---
+
+def _json_mutation(fn, *args, success=None, status=200, error_label="applying change"):
+    """Runs one mutation in its own transaction and answers in JSON."""
     try:
-        new_name = request.form.get('module_name')
-        new_hours = request.form.get('module_hours')
-        
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        cursor.execute(
-            "UPDATE Module SET module_name = %s, module_hours = %s WHERE module_id = %s",
-            (new_name, new_hours, module_id)
-        )
-        db.commit()
-        return jsonify({"success": True, "message": "Module updated"}), 200
+        with get_db_connection() as db, db.cursor() as cursor:
+            result = fn(cursor, *args)
+            db.commit()
+        return jsonify({"success": True, "message": success, **result}), status
+    except MutationError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        if db: db.rollback()
-        print(f"Error updating module: {e}")
+        print(f"Error {error_label}: {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
 
-@app.route('/rename_topic/<int:topic_id>', methods=['POST'])
+@bp.route("/update_topic_stats/<int:topic_id>", methods=["POST"])
+def update_topic_stats(topic_id):
+    # With TOPIC_WRITE_BEHIND=1 the update is buffered and written in a later batch
+    topic_buffer = get_topic_buffer()
+    update = topic_buffer.put if topic_buffer.enabled else mutations.update_topic_stats
+    return _json_mutation(update, topic_id,
+                          request.form.get("completion"), request.form.get("importance"),
+                          success="Updated successfully!", error_label="updating topic stats")
+
+@bp.route('/update_module/<int:module_id>', methods=['POST'])
+def update_module(module_id):
+    return _json_mutation(mutations.update_module, module_id,
+                          request.form.get('module_name'), request.form.get('module_hours'),
+                          success="Module updated", error_label="updating module")
+
+@bp.route('/rename_topic/<int:topic_id>', methods=['POST'])
 def rename_topic(topic_id):
-    db = None
-    cursor = None
+    return _json_mutation(mutations.rename_topic, topic_id, request.form.get('topic_name'),
+                          success="Topic renamed", error_label="renaming topic")
+
+@bp.route('/delete_topic/<int:topic_id>', methods=['POST'])
+def delete_topic(topic_id):
+    return _json_mutation(mutations.delete_topic, topic_id,
+                          success="Topic deleted", error_label="deleting topic")
+
+@bp.route('/add_topic/<int:module_id>', methods=['POST'])
+def add_topic(module_id):
+    return _json_mutation(mutations.add_topic, module_id, request.form.get('topic_name'),
+                          success="Topic added", status=201, error_label="adding topic")
+
+@bp.route('/api/batch', methods=['POST'])
+def batch_mutations():
+    """
+    Applies a list of topic/module operations in one transaction:
+
+        {"ops": [{"op": "update_topic_stats", "topic_id": 3, "completion": 80, "importance": 4},
+                 {"op": "rename_topic", "topic_id": 5, "topic_name": "Heaps"}, ...]}
+
+    Returns per-op results (see db/mutations.apply_batch). A failing op is
+    rolled back on its own; the others are still committed.
+    """
+    payload = request.get_json(silent=True)
+    ops = payload.get("ops") if isinstance(payload, dict) else payload
+    topic_buffer = get_topic_buffer()
+    overrides = {"update_topic_stats": topic_buffer.put} if topic_buffer.enabled else None
     try:
-        new_name = request.form.get('topic_name')
-        if not new_name:
-            return jsonify({"error": "Topic name cannot be empty"}), 400
-
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        cursor.execute(
-            "UPDATE Topics SET topic_name = %s WHERE topic_id = %s",
-            (new_name, topic_id)
-        )
-        db.commit()
-        return jsonify({"success": True, "message": "Topic renamed"}), 200
+        with get_db_connection() as db, db.cursor() as cursor:
+            results = mutations.apply_batch(cursor, ops, overrides)
+            db.commit()
+    except MutationError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        if db: db.rollback()
-        print(f"Error renaming topic: {e}")
+        print(f"Error applying batch: {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
 
-@app.route('/delete_topic/<int:topic_id>', methods=['POST'])
-def delete_topic(topic_id):
-    db = None
-    cursor = None
+    failed = sum(1 for r in results if not r["ok"])
+    return jsonify({"success": failed == 0, "applied": len(results) - failed,
+                    "failed": failed, "results": results})
+
+@bp.route('/api/course/<int:course_id>')
+def course_api(course_id):
+    """
+    The course tree as a compact columnar payload (see db/course_sync.py):
+
+        GET /api/course/3              whole course, with its "version"
+        GET /api/course/3?since=12     only what changed after version 12
+
+    Both answer 304 to a matching If-None-Match, so polling an unchanged
+    course costs one query.
+    """
+    since = request.args.get("since", type=int)
     try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        cursor.execute(
-            "DELETE FROM Topics WHERE topic_id = %s",
-            (topic_id,)
-        )
-        db.commit()
-        return jsonify({"success": True, "message": "Topic deleted"}), 200
+        with get_db_connection() as db:
+            with db.cursor() as cursor:
+                version = versions.get_version(cursor, course_id)
+            topic_buffer = get_topic_buffer()
+            key = f"{course_id}-{'all' if since is None else since}"
+            etag = _etag("course-api", key, f"{version}{topic_buffer.etag_tag(course_id)}")
+            not_modified = _not_modified(etag)
+            if not_modified:
+                return not_modified
+
+            course, module_data = _course_tree(db, course_id, version, topic_buffer)
+            if not course:
+                return jsonify({"error": "Course not found"}), 404
+            if since is not None and since > version:
+                since = None  # Not a version of this course: send everything
+            deleted = ()
+            if since is not None:
+                with db.cursor() as cursor:
+                    deleted = course_sync.deleted_since(cursor, course_id, since)
     except Exception as e:
-        if db: db.rollback()
-        print(f"Error deleting topic: {e}")
+        print(f"Error loading course {course_id} for the API: {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
 
-@app.route('/add_topic/<int:module_id>', methods=['POST'])
-def add_topic(module_id):
-    db = None
-    cursor = None
+    payload = course_sync.course_payload(course, module_data, version, since, deleted,
+                                         topic_buffer.pending_topics(course_id))
+    return _cache_headers(jsonify(payload), etag)
+
+@bp.route('/api/search')
+def search_courses():
+    """
+    Full-text search over course names, codes and topic names:
+
+        GET /api/search?q=dynamic+prog&limit=20
+
+    Every word must match (as a prefix). Returns matching courses and
+    topics, each with the URL of its dashboard.
+    """
+    text = request.args.get("q", "")
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
     try:
-        topic_name = request.form.get('topic_name')
-        if not topic_name:
-            return jsonify({"error": "Topic name cannot be empty"}), 400
-
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        cursor.execute(
-            "INSERT INTO Topics (module_id, topic_name, completion_status, importance) VALUES (%s, %s, 0, 0)",
-            (module_id, topic_name)
-        )
-        db.commit()
-        return jsonify({"success": True, "message": "Topic added"}), 201
+        with get_db_connection() as db, db.cursor(dictionary=True) as cursor:
+            results = search(cursor, text, limit)
     except Exception as e:
-        if db: db.rollback()
-        print(f"Error adding topic: {e}")
+        print(f"Error searching for '{text}': {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
-# In app.py
 
-@app.route('/add_module/<int:course_id>', methods=['POST'])
+    for row in results["courses"] + results["topics"]:
+        row["dashboard_url"] = url_for('main.dashboard', course_id=row["course_id"])
+    return jsonify({"query": text, **results})
+
+@bp.route('/add_module/<int:course_id>', methods=['POST'])
 def add_module(course_id):
     """Adds a new, empty module to a course."""
-    db = None
-    cursor = None
     try:
         module_name = request.form.get('module_name')
         module_hours = request.form.get('module_hours', 0) # Default to 0 hours
 
-        if not module_name:
-            flash("Module name cannot be empty.", "error")
-            return redirect(url_for('dashboard', course_id=course_id))
-
-        # --- Determine the next module number ---
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("SELECT MAX(module_number) as max_num FROM Module WHERE course_id = %s", (course_id,))
-        result = cursor.fetchone()
-        next_module_number = (result['max_num'] or 0) + 1
-        
-        # Reopen cursor without dictionary=True for insert
-        cursor.close() 
-        cursor = db.cursor() 
-        
-        # --- Insert the new module ---
-        cursor.execute(
-            "INSERT INTO Module (course_id, module_number, Module_name, Module_hours) VALUES (%s, %s, %s, %s)",
-            (course_id, next_module_number, module_name, module_hours)
-        )
-        db.commit()
+        with get_db_connection() as db, db.cursor() as cursor:
+            mutations.add_module(cursor, course_id, module_name, module_hours)
+            db.commit()
         flash("New module added successfully!", "success")
-        
+
+    except MutationError as e:
+        flash(str(e), "error")
     except Exception as e:
-        if db: db.rollback()
         print(f"Error adding module: {e}")
         flash(f"Error adding module: {e}", "error")
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
-        
-    return redirect(url_for('dashboard', course_id=course_id))
 
-@app.route('/delete_module/<int:module_id>', methods=['POST'])
+    return redirect(url_for('main.dashboard', course_id=course_id))
+
+@bp.route('/delete_module/<int:module_id>', methods=['POST'])
 def delete_module(module_id):
     """Deletes a module and its topics (due to CASCADE)."""
-    db = None
-    cursor = None
     course_id = None # Need course_id to redirect back
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True) # Use dictionary for SELECT
-
-        # --- Get course_id before deleting for redirection ---
-        cursor.execute("SELECT course_id FROM Module WHERE module_id = %s", (module_id,))
-        module = cursor.fetchone()
-        if module:
-            course_id = module['course_id']
-        else:
-            flash("Module not found.", "error")
-            return redirect(url_for('home')) # Or some error page
-
-        # Reopen cursor without dictionary=True for delete
-        cursor.close()
-        cursor = db.cursor()
-
-        # --- Delete the module (CASCADE handles topics) ---
-        cursor.execute("DELETE FROM Module WHERE module_id = %s", (module_id,))
-        db.commit()
+        with get_db_connection() as db, db.cursor() as cursor:
+            course_id = mutations.delete_module(cursor, module_id)["course_id"]
+            db.commit()
         flash("Module deleted successfully!", "success")
-        
+
+    except MutationError as e:
+        flash(str(e), "error")
     except Exception as e:
-        if db: db.rollback()
         print(f"Error deleting module: {e}")
         flash(f"Error deleting module: {e}", "error")
-    finally:
-        if cursor: cursor.close()
-        if db: db.close()
 
     # Redirect back to the dashboard if possible, otherwise home
     if course_id:
-        return redirect(url_for('dashboard', course_id=course_id))
+        return redirect(url_for('main.dashboard', course_id=course_id))
     else:
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
+
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    """Content-hashed CSS/JS from `python -m assets.build`, cached as immutable."""
+    return get_asset_manifest().send(filename)
+
+# --- DIAGNOSTICS ---
+
+@bp.route('/stats/pool')
+def db_pool_stats():
+    """Connection pool counters: open/idle/in use, waiting threads, total checkouts."""
+    return jsonify(pool_stats())
+
+@bp.route('/stats/jobs')
+def parse_job_stats():
+    """Parse queue counters: pending jobs, rejections (429s), executor settings."""
+    return jsonify(get_parse_queue().stats())
+
+@bp.route('/stats/parse_cache')
+def parse_cache_stats():
+    """Parsed-syllabus cache counters: entries, hits, misses, evictions."""
+    return jsonify(get_parse_cache().stats())
+
+@bp.route('/stats/tree_cache')
+def tree_cache_stats():
+    """Dashboard tree cache counters: entries, bytes, hits, misses, evictions, invalidations."""
+    return jsonify(get_tree_cache().stats())
+
+@bp.route('/stats/layout_templates')
+def layout_template_stats():
+    """Syllabus layout templates: count, hits (fast path), fallbacks, misses, hit rate."""
+    return jsonify(get_layout_registry().stats())
+
+@bp.route('/stats/topic_buffer')
+def topic_buffer_stats():
+    return jsonify(get_topic_buffer().stats())
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Request latency, DB query and parser stage metrics in Prometheus text format."""
+    return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; see wsgi.py for production
+    create_app().run(debug=True)
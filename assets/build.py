@@ -0,0 +1,145 @@
+"""
+Builds the front-end assets served from static/dist.
+
+    npm install                 # once: Tailwind CLI, Alpine.js, Chart.js (package.json)
+    python -m assets.build
+
+The Tailwind stylesheet is compiled from assets/app.css, purged against
+templates/ and minified; Alpine.js and Chart.js are copied from
+node_modules. Each file is written under a content-hashed name
+(app.3f2a1b9c.css) with precompressed .gz and, if the `brotli` module is
+installed, .br variants next to it. manifest.json maps the logical names
+the templates use to those files (see assets/manifest.py). Files left by
+earlier builds are removed.
+
+TAILWIND_BIN points at another Tailwind CLI, e.g. the standalone binary
+on machines without npm access.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped; gzip still works everywhere
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NODE_MODULES = os.path.join(ROOT, "node_modules")
+OUT_DIR = os.path.join(ROOT, "static", "dist")
+MANIFEST = "manifest.json"
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+HASH_LENGTH = 8
+
+TAILWIND_BIN = os.environ.get("TAILWIND_BIN", os.path.join(NODE_MODULES, ".bin", "tailwindcss"))
+TAILWIND_CONFIG = os.path.join(ROOT, "assets", "tailwind.config.js")
+TAILWIND_INPUT = os.path.join(ROOT, "assets", "app.css")
+
+# Logical name -> file copied as is
+VENDORED = {
+    "alpine.js": os.path.join(NODE_MODULES, "alpinejs", "dist", "cdn.min.js"),
+    "chart.js": os.path.join(NODE_MODULES, "chart.js", "dist", "chart.umd.js"),
+    "dashboard_styles.css": os.path.join(ROOT, "static", "css", "dashboard_styles.css"),
+}
+
+# Smaller files gain nothing from compression
+MIN_COMPRESS_BYTES = 1024
+
+
+class BuildError(Exception):
+    """A source is missing or the Tailwind CLI failed."""
+
+
+def compile_tailwind(output):
+    if not os.path.exists(TAILWIND_BIN):
+        raise BuildError(f"Tailwind CLI not found at {TAILWIND_BIN}. Run `npm install` or set TAILWIND_BIN.")
+    result = subprocess.run(
+        [TAILWIND_BIN, "-c", TAILWIND_CONFIG, "-i", TAILWIND_INPUT, "-o", output, "--minify"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise BuildError(f"tailwindcss failed:\n{result.stderr.strip()}")
+
+
+def hashed_name(name, content):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _write(path, content):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def build(sources, out_dir=OUT_DIR):
+    """
+    Writes each of `sources` ({logical name: path}) to `out_dir` under its
+    hashed name, with compressed variants, then the manifest. Returns the
+    manifest dict.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    for name, path in sorted(sources.items()):
+        if not os.path.exists(path):
+            raise BuildError(f"{name}: {path} does not exist. Run `npm install` first.")
+        with open(path, "rb") as f:
+            content = f.read()
+        filename = hashed_name(name, content)
+        _write(os.path.join(out_dir, filename), content)
+
+        encodings = []
+        if len(content) >= MIN_COMPRESS_BYTES:
+            # mtime=0 keeps the .gz byte-identical across builds
+            _write(os.path.join(out_dir, filename + SUFFIXES["gzip"]), gzip.compress(content, 9, mtime=0))
+            encodings.append("gzip")
+            if brotli is not None:
+                _write(os.path.join(out_dir, filename + SUFFIXES["br"]), brotli.compress(content, quality=11))
+                encodings.append("br")
+        manifest[name] = {"file": filename, "encodings": encodings, "bytes": len(content)}
+
+    _write(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    _remove_stale(out_dir, manifest)
+    return manifest
+
+
+def _remove_stale(out_dir, manifest):
+    keep = {MANIFEST}
+    for entry in manifest.values():
+        keep.add(entry["file"])
+        keep.update(entry["file"] + SUFFIXES[encoding] for encoding in entry["encodings"])
+    for filename in os.listdir(out_dir):
+        if filename not in keep:
+            os.remove(os.path.join(out_dir, filename))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m assets.build", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default=OUT_DIR, help="output directory (default: static/dist)")
+    args = parser.parse_args(argv)
+
+    if brotli is None:
+        print("brotli is not installed; writing gzip variants only (pip install brotli).", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = dict(VENDORED, **{"app.css": os.path.join(tmp, "app.css")})
+        try:
+            compile_tailwind(sources["app.css"])
+            manifest = build(sources, args.out)
+        except BuildError as e:
+            print(f"Build failed: {e}", file=sys.stderr)
+            return 1
+
+    for name, entry in sorted(manifest.items()):
+        variants = ", ".join(entry["encodings"]) or "uncompressed"
+        print(f"{name:<22} {entry['file']:<34} {entry['bytes'] / 1024:8.1f} KiB  ({variants})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Serves the files built by `python -m assets.build` from /assets/<name>.
+
+Built file names carry their content hash, so a response may be cached
+for a year without revalidation ("immutable"); a rebuild changes the
+name, and pages link the new one. The precompressed .br / .gz variant is
+sent when the client's Accept-Encoding allows it, so nothing is
+compressed per request.
+
+Templates call asset_url("alpine.js"), which returns None until the
+assets are built; the pages then fall back to the public CDNs. The
+manifest is read once per process, so restart after a rebuild.
+"""
+import json
+import mimetypes
+import os
+import threading
+
+from flask import abort, request, send_file, url_for
+
+ASSET_CONFIG = {
+    "directory": os.environ.get(
+        "ASSET_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "dist")
+    ),
+    "max_age": int(os.environ.get("ASSET_MAX_AGE", 365 * 24 * 3600)),
+}
+
+# Preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class AssetManifest:
+    def __init__(self, directory, max_age=365 * 24 * 3600):
+        self.directory = directory
+        self.max_age = max_age
+        try:
+            with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except ValueError as e:
+            print(f"Ignoring unreadable asset manifest in {directory}: {e}")
+            self._entries = {}
+        # Built file name -> manifest entry; only these can be served
+        self._files = {entry["file"]: entry for entry in self._entries.values()}
+
+    def url(self, name):
+        entry = self._entries.get(name)
+        return url_for("main.asset", filename=entry["file"]) if entry else None
+
+    def send(self, filename):
+        """Response for a built file, precompressed if the client accepts it."""
+        entry = self._files.get(filename)
+        if entry is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        encoding, path = None, os.path.join(self.directory, filename)
+        for candidate, suffix in ENCODINGS:
+            if candidate in entry["encodings"] and request.accept_encodings[candidate]:
+                encoding, path = candidate, path + suffix
+                break
+
+        response = send_file(path, mimetype=mimetype, max_age=self.max_age, conditional=True)
+        if encoding:
+            response.content_encoding = encoding
+        if entry["encodings"]:
+            response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_asset_manifest():
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = AssetManifest(**ASSET_CONFIG)
+    return _manifest
+
+
+def asset_url(name):
+    """URL of a built asset by logical name ("app.css"), or None if not built."""
+    return get_asset_manifest().url(name)
@@ -0,0 +1,7 @@
+// Purge against every template: classes built in inline scripts and
+// Alpine :class bindings live there too.
+module.exports = {
+  content: ["./templates/**/*.html"],
+  theme: { extend: {} },
+  plugins: [],
+};
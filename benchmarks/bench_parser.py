@@ -0,0 +1,228 @@
+"""
+Parser benchmark over synthetic syllabus PDFs.
+
+Times each stage of parsers/syllabus_parser.py separately:
+
+    open           pdfplumber.open() + close
+    full_table     get_full_table(): table extraction on every page
+    stream_scan    iter_table_rows() + scan_module_rows(): stops after the modules
+    template_scan  stream_scan through a warmed layout-template registry (fast path)
+    merge          scan_module_rows() over already-extracted rows
+    split          build_syllabus(): module header parsing + topic splitting
+    db_write       save_syllabus() against the configured DB (only with --db)
+
+Results are written as JSON so runs can be compared over time:
+
+    python -m benchmarks.bench_parser                     # full matrix
+    python -m benchmarks.bench_parser --quick
+    python -m benchmarks.bench_parser --db                # include DB writes
+    python -m benchmarks.bench_parser --compare benchmarks/results/old.json
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import pdfplumber
+
+from benchmarks.synthetic_syllabus import write_syllabus_pdf
+from parsers.layout_templates import LayoutRegistry
+from parsers.syllabus_parser import build_syllabus, get_full_table, iter_table_rows, scan_module_rows
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+MATRIX = {
+    "pages": (1, 5, 20),
+    "modules": (5, 15),
+    "topics_per_module": (5, 20),
+    "delimiter": ("dash", "comma"),
+}
+QUICK_MATRIX = {
+    "pages": (1, 5),
+    "modules": (6,),
+    "topics_per_module": (8,),
+    "delimiter": ("dash", "comma"),
+}
+
+
+def _time(fn, repeat):
+    """Runs fn `repeat` times (parser prints silenced). Returns (timings, last result)."""
+    timings, result = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def _summary(timings):
+    return {
+        "min": round(min(timings), 6),
+        "median": round(statistics.median(timings), 6),
+        "mean": round(statistics.fmean(timings), 6),
+        "runs": len(timings),
+    }
+
+
+def _stream_scan(path, layouts=False):
+    with pdfplumber.open(path) as pdf:
+        rows = iter_table_rows(pdf, layouts=layouts)
+        try:
+            return scan_module_rows(rows)
+        finally:
+            rows.close()
+
+
+def _full_table(path):
+    with pdfplumber.open(path) as pdf:
+        return get_full_table(pdf, layouts=False)
+
+
+def _open_close(path):
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _db_write(syllabus):
+    from db.connection import get_db_connection
+    from db.syllabus_writer import save_syllabus
+
+    course_id = save_syllabus(syllabus)
+    # Keep the benchmark DB from growing; CASCADE removes modules/topics
+    with get_db_connection() as db, db.cursor() as cursor:
+        cursor.execute("DELETE FROM Course WHERE course_id = %s", (course_id,))
+        db.commit()
+    return course_id
+
+
+def run_case(path, repeat, with_db):
+    stages = {}
+    t, _ = _time(lambda: _open_close(path), repeat)
+    stages["open"] = _summary(t)
+    t, rows = _time(lambda: _full_table(path), repeat)
+    stages["full_table"] = _summary(t)
+    t, _ = _time(lambda: _stream_scan(path), repeat)
+    stages["stream_scan"] = _summary(t)
+    layouts = LayoutRegistry()  # In memory; the first scan records the layouts
+    _time(lambda: _stream_scan(path, layouts), 1)
+    t, _ = _time(lambda: _stream_scan(path, layouts), repeat)
+    stages["template_scan"] = _summary(t)
+    t, (header, merged) = _time(lambda: scan_module_rows(iter(rows)), repeat)
+    stages["merge"] = _summary(t)
+    t, syllabus = _time(lambda: build_syllabus(header, merged), repeat)
+    stages["split"] = _summary(t)
+
+    if with_db:
+        try:
+            t, _ = _time(lambda: _db_write(syllabus), repeat)
+            stages["db_write"] = _summary(t)
+        except Exception as e:
+            stages["db_write"] = {"error": f"{type(e).__name__}: {e}"}
+
+    return stages, syllabus, {
+        "rows": len(rows),
+        "modules": len(syllabus.modules),
+        "topics": syllabus.topic_count,
+    }
+
+
+def mismatches(syllabus, expected):
+    """Differences between a parsed Syllabus and the generator's ground truth (empty = parsed correctly)."""
+    found = []
+    for field in ("course_code", "course_name"):
+        if getattr(syllabus, field) != expected[field]:
+            found.append(f"{field}: {getattr(syllabus, field)!r} != {expected[field]!r}")
+    if len(syllabus.modules) != len(expected["modules"]):
+        found.append(f"{len(syllabus.modules)} modules, expected {len(expected['modules'])}")
+    for module, want in zip(syllabus.modules, expected["modules"]):
+        name = f"Module:{want['number']} {want['title']}"
+        if (module.number, module.name, module.hours) != (want["number"], name, want["hours"]):
+            found.append(f"module {want['number']}: {(module.number, module.name, module.hours)!r} "
+                         f"!= {(want['number'], name, want['hours'])!r}")
+        if module.topics != want["topics"]:
+            found.append(f"module {want['number']} topics: {module.topics!r} != {want['topics']!r}")
+    return found
+
+
+def run(matrix, repeat=3, with_db=False, out=sys.stdout):
+    cases = []
+    keys = list(matrix)
+    with tempfile.TemporaryDirectory() as tmp:
+        for values in itertools.product(*(matrix[k] for k in keys)):
+            params = dict(zip(keys, values))
+            path = os.path.join(tmp, "syllabus.pdf")
+            expected = write_syllabus_pdf(path, seed=len(cases), **params)
+            stages, syllabus, counts = run_case(path, repeat, with_db)
+
+            problems = mismatches(syllabus, expected)
+            ok = not problems
+            cases.append({"params": params, "parsed": counts, "parsed_ok": ok, "mismatches": problems[:10],
+                          "stages": stages})
+
+            label = " ".join(f"{k}={v}" for k, v in params.items())
+            timings = "  ".join(f"{name}={s['median'] * 1000:.1f}ms" if "median" in s else f"{name}=ERROR"
+                                for name, s in stages.items())
+            print(f"{label:<55} {timings}{'' if ok else '  (PARSE MISMATCH)'}", file=out)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pdfplumber": getattr(pdfplumber, "__version__", "unknown"),
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+def compare(old, new, out=sys.stdout):
+    """Prints median-time ratios (new / old) for cases present in both runs."""
+    old_cases = {json.dumps(c["params"], sort_keys=True): c for c in old["cases"]}
+    print(f"\n--- new vs {old.get('timestamp', 'baseline')} (median ratio, <1 is faster) ---", file=out)
+    for case in new["cases"]:
+        before = old_cases.get(json.dumps(case["params"], sort_keys=True))
+        if not before:
+            continue
+        ratios = []
+        for name, s in case["stages"].items():
+            prev = before["stages"].get(name, {})
+            if "median" in s and prev.get("median"):
+                ratios.append(f"{name}={s['median'] / prev['median']:.2f}x")
+        label = " ".join(f"{k}={v}" for k, v in case["params"].items())
+        print(f"{label:<55} {'  '.join(ratios)}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the syllabus parser on synthetic PDFs.")
+    parser.add_argument("--quick", action="store_true", help="Small matrix for a fast sanity run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (default 3)")
+    parser.add_argument("--db", action="store_true", help="Also time DB writes against the configured DB")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/parser-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    results = run(QUICK_MATRIX if args.quick else MATRIX, repeat=args.repeat, with_db=args.db)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"parser-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+    return 0 if all(c["parsed_ok"] for c in results["cases"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+"""
+Load test: replays a mix of student traffic against the app over HTTP.
+
+Seeds N courses from synthetic syllabi (benchmarks/synthetic_syllabus.py,
+parsed once per variant and written with save_syllabus()), then runs
+--users virtual users that together send --rps requests per second for
+--duration seconds. Each request picks a route by the --mix weights:
+
+    home                GET  /
+    dashboard           GET  /dashboard/<seeded course>
+    update_topic_stats  POST /update_topic_stats/<seeded topic>
+    add_topic           POST /add_topic/<seeded module>
+    upload              POST /upload (one of the synthetic PDFs)
+
+Repeat page views send If-None-Match like a browser does, so 304s are
+part of the mix (--no-etags turns that off). Requests in the first
+--warmup seconds are not counted. Per-route throughput, p50/p95/p99
+latency and error rate are printed as a table and saved as JSON:
+
+    python -m benchmarks.load_test --courses 50 --users 40 --rps 100 --duration 30
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --slo dashboard=200
+
+Without --url the app is served in this process by a threaded Werkzeug
+server, which shares the GIL with the load generator: numbers are
+pessimistic. For capacity figures start gunicorn (gunicorn.conf.py) and
+pass --url. Seeding and cleanup use the DB configured by the DB_* /
+DB_BACKEND variables, so it must be the one the server uses. Seeded and
+uploaded courses are deleted at the end unless --keep is given.
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.synthetic_syllabus import write_syllabus_pdf
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+DEFAULT_MIX = {"home": 15, "dashboard": 50, "update_topic_stats": 25, "add_topic": 8, "upload": 2}
+PERCENTILES = (50, 95, 99)
+REQUEST_TIMEOUT = 30
+
+COURSE_ITEMS_SQL = """
+    SELECT M.course_id, M.module_id, T.topic_id
+    FROM Module M
+    LEFT JOIN Topics T ON T.module_id = M.module_id
+    WHERE M.course_id IN ({ids})
+"""
+
+
+# --- Seeding ---
+
+def make_syllabi(directory, variants):
+    """Writes `variants` synthetic PDFs of varying size. Returns [(path, Syllabus)]."""
+    from parsers.syllabus_parser import extract_syllabus
+
+    syllabi = []
+    for i in range(variants):
+        path = os.path.join(directory, f"syllabus-{i}.pdf")
+        write_syllabus_pdf(path, modules=5 + i % 4, topics_per_module=6 + 2 * (i % 5),
+                           delimiter=("dash", "comma")[i % 2], seed=i)
+        with contextlib.redirect_stdout(io.StringIO()):
+            syllabus = extract_syllabus(path)
+        if syllabus is None:
+            raise RuntimeError(f"Synthetic syllabus {path} did not parse")
+        syllabi.append((path, syllabus))
+    return syllabi
+
+
+def seed(syllabi, courses):
+    """Saves `courses` courses round-robin from `syllabi`. Returns the data the users draw ids from."""
+    from db.connection import get_db_connection
+    from db.syllabus_writer import save_syllabus
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        course_ids = [save_syllabus(syllabi[i % len(syllabi)][1]) for i in range(courses)]
+
+    module_ids, topic_ids = set(), []
+    with get_db_connection() as db, db.cursor() as cursor:
+        cursor.execute(COURSE_ITEMS_SQL.format(ids=", ".join(["%s"] * len(course_ids))), tuple(course_ids))
+        for _, module_id, topic_id in cursor.fetchall():
+            module_ids.add(module_id)
+            if topic_id is not None:
+                topic_ids.append(topic_id)
+    return {"course_ids": course_ids, "module_ids": sorted(module_ids), "topic_ids": topic_ids,
+            "pdfs": [path for path, _ in syllabi]}
+
+
+def delete_courses(course_ids):
+    from db import mutations
+    from db.connection import get_db_connection
+
+    with get_db_connection() as db, db.cursor() as cursor:
+        for course_id in course_ids:
+            try:
+                mutations.delete_course(cursor, course_id)
+            except mutations.MutationError:
+                pass  # Already gone
+        db.commit()
+
+
+# --- Requests ---
+
+def _multipart(filename, content):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class Routes:
+    """Builds (method, path, body, headers) for each route in the mix."""
+
+    FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    def __init__(self, data):
+        self.data = data
+        self.uploads = []
+        for path in data["pdfs"]:
+            with open(path, "rb") as f:
+                self.uploads.append((os.path.basename(path), f.read()))
+
+    def home(self, rng):
+        return "GET", "/", None, {}
+
+    def dashboard(self, rng):
+        return "GET", f"/dashboard/{rng.choice(self.data['course_ids'])}", None, {}
+
+    def update_topic_stats(self, rng):
+        body = urlencode({"completion": rng.randint(0, 100), "importance": rng.randint(0, 5)})
+        return "POST", f"/update_topic_stats/{rng.choice(self.data['topic_ids'])}", body, self.FORM
+
+    def add_topic(self, rng):
+        body = urlencode({"topic_name": f"Load test topic {rng.randrange(10 ** 6)}"})
+        return "POST", f"/add_topic/{rng.choice(self.data['module_ids'])}", body, self.FORM
+
+    def upload(self, rng):
+        filename, content = rng.choice(self.uploads)
+        body, content_type = _multipart(filename, content)
+        return "POST", "/upload", body, {"Content-Type": content_type, "Accept": "application/json"}
+
+
+class VirtualUser(threading.Thread):
+    """
+    Sends one request every `interval` seconds on its own keep-alive
+    connection until `stop_at`. A request that can't start on time (the
+    previous one was still running) is sent at once and counted as late.
+    """
+
+    def __init__(self, index, target, routes, mix, interval, start_at, measure_from, stop_at, etags=True, seed=0):
+        super().__init__(name=f"vu-{index}", daemon=True)
+        self.target = target
+        self.routes = routes
+        self.names, self.weights = list(mix), list(mix.values())
+        self.interval = interval
+        self.rng = random.Random(seed * 100003 + index)
+        self.next_at = start_at + self.rng.random() * interval  # Spread users over one interval
+        self.measure_from = measure_from
+        self.stop_at = stop_at
+        self.etags = {} if etags else None
+        self.samples = []  # (route, seconds, status or None)
+        self.late = 0
+        self.job_ids = []
+
+    def _connect(self):
+        scheme, host, port = self.target
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=REQUEST_TIMEOUT)
+
+    def run(self):
+        conn = self._connect()
+        while self.next_at < self.stop_at:
+            delay = self.next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > self.interval:
+                self.late += 1
+            self.next_at += self.interval
+
+            route = self.rng.choices(self.names, self.weights)[0]
+            method, path, body, headers = getattr(self.routes, route)(self.rng)
+            if self.etags is not None and path in self.etags:
+                headers = {**headers, "If-None-Match": self.etags[path]}
+            started = time.perf_counter()
+            status, payload = self._send(conn, method, path, body, headers)
+            if status is None:
+                conn.close()
+                conn = self._connect()
+            if started >= self.measure_from:
+                self.samples.append((route, time.perf_counter() - started, status))
+            if route == "upload" and status == 202:
+                self.job_ids.append(json.loads(payload)["job_id"])
+        conn.close()
+
+    def _send(self, conn, method, path, body, headers):
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            return None, None
+        etag = response.getheader("ETag")
+        if self.etags is not None and etag and method == "GET":
+            self.etags[path] = etag
+        return response.status, payload
+
+
+# --- Results ---
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples, seconds):
+    latencies = sorted(s for _, s, _ in samples)
+    statuses = {}
+    for _, _, status in samples:
+        key = str(status) if status is not None else "connection_error"
+        statuses[key] = statuses.get(key, 0) + 1
+    errors = sum(count for key, count in statuses.items() if key == "connection_error" or int(key) >= 400)
+    summary = {
+        "requests": len(samples),
+        "rps": round(len(samples) / seconds, 1) if seconds else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "status": statuses,
+    }
+    for pct in PERCENTILES:
+        value = percentile(latencies, pct)
+        summary[f"p{pct}_ms"] = round(value * 1000, 2) if value is not None else None
+    summary["max_ms"] = round(latencies[-1] * 1000, 2) if latencies else None
+    return summary
+
+
+def print_table(results, out=sys.stdout):
+    header = f"{'route':<20} {'requests':>9} {'rps':>8} {'errors':>7} {'err %':>6}" + "".join(
+        f" {f'p{pct} ms':>9}" for pct in PERCENTILES) + f" {'max ms':>9}"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    rows = list(results["routes"].items()) + [("total", results["total"])]
+    for name, s in rows:
+        latencies = "".join(f" {s[f'p{pct}_ms'] if s[f'p{pct}_ms'] is not None else '-':>9}" for pct in PERCENTILES)
+        print(f"{name:<20} {s['requests']:>9} {s['rps']:>8} {s['errors']:>7} {s['error_rate'] * 100:>6.1f}"
+              f"{latencies} {s['max_ms'] if s['max_ms'] is not None else '-':>9}", file=out)
+
+
+# --- Running ---
+
+def _serve_in_process():
+    """Starts the app on a free local port. Returns (base url, stop function)."""
+    from werkzeug.serving import make_server
+
+    import app as web
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # No line per request
+    server = make_server("127.0.0.1", 0, web.create_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="load-test-server", daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        thread.join()
+        web.shutdown()
+
+    return f"http://127.0.0.1:{server.server_port}", stop
+
+
+def _target(url):
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Expected an http(s):// URL, got {url!r}")
+    return parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+
+
+def _uploaded_courses(target, job_ids, timeout=60):
+    """Course ids created by the upload jobs, waiting up to `timeout` seconds for them to finish."""
+    scheme, host, port = target
+    cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    conn = cls(host, port, timeout=REQUEST_TIMEOUT)
+    course_ids, waiting = [], list(job_ids)
+    deadline = time.monotonic() + timeout
+    try:
+        while waiting and time.monotonic() < deadline:
+            still_waiting = []
+            for job_id in waiting:
+                conn.request("GET", f"/jobs/{job_id}")
+                job = json.loads(conn.getresponse().read())
+                if job.get("status") in ("queued", "running"):
+                    still_waiting.append(job_id)
+                elif job.get("course_id"):
+                    course_ids.append(job["course_id"])
+            waiting = still_waiting
+            if waiting:
+                time.sleep(0.5)
+    finally:
+        conn.close()
+    if waiting:
+        print(f"{len(waiting)} upload job(s) still running; their courses are not cleaned up.", file=sys.stderr)
+    return course_ids
+
+
+def run(url, data, mix, users, rps, duration, warmup, etags=True, seed=0):
+    target = _target(url)
+    routes = Routes(data)
+    interval = users / rps
+    start_at = time.perf_counter() + 0.1
+    measure_from = start_at + warmup
+    stop_at = measure_from + duration
+    vus = [VirtualUser(i, target, routes, mix, interval, start_at, measure_from, stop_at, etags, seed)
+           for i in range(users)]
+    for vu in vus:
+        vu.start()
+    for vu in vus:
+        vu.join()
+    # Requests still running at stop_at are counted; measure until the last one ended
+    seconds = max(time.perf_counter(), stop_at) - measure_from
+
+    samples = [sample for vu in vus for sample in vu.samples]
+    by_route = {name: [s for s in samples if s[0] == name] for name in mix}
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "url": url,
+        "users": users,
+        "target_rps": rps,
+        "duration": duration,
+        "warmup": warmup,
+        "mix": mix,
+        "etags": etags,
+        "courses": len(data["course_ids"]),
+        "topics": len(data["topic_ids"]),
+        "achieved_rps": round(len(samples) / seconds, 1),
+        "late_requests": sum(vu.late for vu in vus),
+        "routes": {name: summarize(route_samples, seconds) for name, route_samples in by_route.items()},
+        "total": summarize(samples, seconds),
+    }, [job_id for vu in vus for job_id in vu.job_ids]
+
+
+def _parse_weights(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown route {name!r} (choose from {', '.join(DEFAULT_MIX)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight for {name!r}: {weight!r}")
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+    if not mix:
+        raise argparse.ArgumentTypeError("the mix needs at least one route with a positive weight")
+    return mix
+
+
+def _parse_slo(text):
+    name, _, limit = text.partition("=")
+    if name not in DEFAULT_MIX and name != "total":
+        raise argparse.ArgumentTypeError(f"unknown route {name!r}")
+    try:
+        return name, float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected ROUTE=MILLISECONDS, got {text!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test",
+                                     description="Replay a mix of student traffic against the app.")
+    parser.add_argument("--url", help="running instance to test, e.g. http://127.0.0.1:8000 "
+                                      "(default: serve the app in this process)")
+    parser.add_argument("--courses", type=int, default=20, help="courses to seed (default 20)")
+    parser.add_argument("--variants", type=int, default=6, help="distinct synthetic syllabi (default 6)")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users (default 20)")
+    parser.add_argument("--rps", type=float, default=50, help="target requests per second, all users (default 50)")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds (default 30)")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds before measuring starts (default 5)")
+    parser.add_argument("--mix", type=_parse_weights, default=DEFAULT_MIX,
+                        help="route weights, e.g. dashboard=60,update_topic_stats=30,home=10 "
+                             f"(default {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument("--no-etags", dest="etags", action="store_false", help="never send If-None-Match")
+    parser.add_argument("--slo", type=_parse_slo, action="append", default=[], metavar="ROUTE=MS",
+                        help="p99 budget; exit 1 if exceeded (repeatable, e.g. dashboard=200)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the users")
+    parser.add_argument("--keep", action="store_true", help="keep seeded and uploaded courses")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    if args.courses < 1 or args.users < 1 or args.rps <= 0 or args.variants < 1:
+        parser.error("--courses, --users, --variants and --rps must be positive")
+
+    stop_server = None
+    job_ids, data = [], None
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            print(f"Seeding {args.courses} courses from {args.variants} synthetic syllabi...", file=sys.stderr)
+            data = seed(make_syllabi(tmp, args.variants), args.courses)
+            url = args.url
+            if url is None:
+                url, stop_server = _serve_in_process()
+            print(f"Running {args.users} users at {args.rps:g} rps against {url} "
+                  f"for {args.warmup:g}s warmup + {args.duration:g}s...", file=sys.stderr)
+            results, job_ids = run(url, data, args.mix, args.users, args.rps, args.duration, args.warmup,
+                                   args.etags, args.seed)
+        finally:
+            if data is not None and not args.keep:
+                uploaded = _uploaded_courses(_target(url), job_ids) if job_ids else []
+                delete_courses(data["course_ids"] + uploaded)
+            if stop_server is not None:
+                stop_server()
+
+    print(file=sys.stderr)
+    print_table(results)
+    print(f"\nachieved {results['achieved_rps']} of {args.rps:g} rps target; "
+          f"{results['late_requests']} request(s) started late")
+    if results["achieved_rps"] < 0.95 * args.rps:
+        print("The target rate was not reached: the app (or this generator) is saturated. "
+              "Latencies above are for the rate it could sustain.")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {output}")
+
+    failed = []
+    for name, limit in args.slo:
+        p99 = (results["total"] if name == "total" else results["routes"].get(name, {})).get("p99_ms")
+        if p99 is not None and p99 > limit:
+            failed.append(f"{name} p99 {p99} ms > {limit:g} ms")
+    for line in failed:
+        print(f"SLO missed: {line}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
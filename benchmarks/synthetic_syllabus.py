@@ -0,0 +1,182 @@
+"""
+Generates synthetic VIT-style syllabus PDFs, fully offline.
+
+The PDFs are written by hand (no reportlab needed): every row is a ruled
+table row, so pdfplumber's default line-based table detection finds the
+same layout the parser expects from real syllabi:
+
+    [course code | course title | L T P C]
+    [Pre-requisite ...], [Course Objectives ...], ...
+    [Module:1 | <module title> | 6 hours]
+    [<topic - topic - topic ...>]            (one cell spanning the row)
+    ...
+    [Total Lecture hours: | | 45 hours]
+    [Text Book(s)], [Reference Books], ...   (plus optional filler pages)
+"""
+import random
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN_X, MARGIN_TOP, MARGIN_BOTTOM = 40, 40, 50
+COLUMNS = (110, 330, 75)
+TABLE_WIDTH = sum(COLUMNS)
+FONT_SIZE = 9
+LINE_HEIGHT = 11
+CELL_PADDING = 4
+CHAR_WIDTH = FONT_SIZE * 0.52  # Rough Helvetica average, only used for wrapping
+
+WORDS = (
+    "array stack queue linked list tree graph heap hash table sorting searching "
+    "recursion dynamic programming greedy backtracking complexity traversal "
+    "binary search balanced insertion deletion priority shortest path spanning "
+    "network protocol process thread memory paging scheduling deadlock file "
+    "system compiler grammar parsing lexical analysis optimisation register"
+).split()
+
+
+def make_syllabus_rows(modules=6, topics_per_module=8, delimiter="dash",
+                       trailing_rows=6, seed=0):
+    """
+    Builds the table rows for one synthetic syllabus.
+    A row is a list of cell strings; a 1-element list spans the full width.
+    `delimiter` is "dash", "endash" or "comma".
+    Returns (rows, expected) where expected mirrors what the parser should find.
+    """
+    rng = random.Random(seed)
+    sep = {"dash": " - ", "endash": " – ", "comma": ", "}[delimiter]
+
+    code = f"BCSE{rng.randint(100, 999)}L"
+    name = " ".join(w.title() for w in rng.sample(WORDS, 3))
+    rows = [
+        [code, name, "3 0 0 3"],
+        ["Pre-requisite", "NIL", "Syllabus version"],
+        ["", "", "1.0"],
+        ["Course Objectives"],
+        [f"1. To introduce the fundamentals of {name.lower()}."],
+        ["Course Outcomes"],
+        ["On completion of this course, students should be able to apply the concepts."],
+    ]
+
+    expected_modules = []
+    total_hours = 0
+    for number in range(1, modules + 1):
+        hours = rng.randint(3, 8)
+        total_hours += hours
+        title = " ".join(w.title() for w in rng.sample(WORDS, 2))
+        topics = [" ".join(rng.sample(WORDS, rng.randint(1, 3))).capitalize()
+                  for _ in range(topics_per_module)]
+        rows.append([f"Module:{number}", title, f"{hours} hours"])
+        rows.append([sep.join(topics)])
+        expected_modules.append({"number": number, "title": title, "hours": hours, "topics": topics})
+
+    rows.append(["Total Lecture hours:", "", f"{total_hours} hours"])
+    rows.append(["Text Book(s)"])
+    for i in range(trailing_rows):
+        rows.append([f"{i + 1}. " + " ".join(w.title() for w in rng.sample(WORDS, 6)) + ", Publisher, 2021."])
+
+    expected = {"course_code": code, "course_name": name, "modules": expected_modules}
+    return rows, expected
+
+
+def _wrap(text, width):
+    max_chars = max(1, int((width - 2 * CELL_PADDING) / CHAR_WIDTH))
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if len(candidate) > max_chars and line:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines or [""]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _layout(rows, min_pages=1):
+    """Places rows on pages. Returns a list of pages, each a list of PDF drawing ops."""
+    pages, ops = [], []
+    y = PAGE_HEIGHT - MARGIN_TOP
+
+    def new_page():
+        nonlocal ops, y
+        pages.append(ops)
+        ops = []
+        y = PAGE_HEIGHT - MARGIN_TOP
+
+    for row in rows:
+        widths = (TABLE_WIDTH,) if len(row) == 1 else COLUMNS
+        cells = [_wrap(text, w) for text, w in zip(row, widths)]
+        height = max(len(c) for c in cells) * LINE_HEIGHT + 2 * CELL_PADDING
+        if y - height < MARGIN_BOTTOM:
+            new_page()
+
+        x = MARGIN_X
+        for lines, w in zip(cells, widths):
+            ops.append(f"{x} {y - height} {w} {height} re S")
+            for i, line in enumerate(lines):
+                if line:
+                    ty = y - CELL_PADDING - (i + 1) * LINE_HEIGHT + 2
+                    ops.append(f"BT /F1 {FONT_SIZE} Tf {x + CELL_PADDING} {ty} Td ({_escape(line)}) Tj ET")
+            x += w
+        y -= height
+
+    pages.append(ops)
+    # Filler pages (e.g. lab lists, appendices) the parser should not need to read
+    while len(pages) < min_pages:
+        filler = []
+        fy = PAGE_HEIGHT - MARGIN_TOP
+        for i in range(40):
+            filler.append(f"{MARGIN_X} {fy - 18} {TABLE_WIDTH} 18 re S")
+            filler.append(f"BT /F1 {FONT_SIZE} Tf {MARGIN_X + CELL_PADDING} {fy - 13} Td "
+                          f"(Experiment {len(pages)}.{i + 1}: " + " ".join(WORDS[i % 20:i % 20 + 4]) + ") Tj ET")
+            fy -= 18
+        pages.append(filler)
+    return pages
+
+
+def write_pdf(path, pages):
+    """Writes a minimal PDF with one Helvetica font and the given content streams."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, filled in below once the page object ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for ops in pages:
+        stream = "\n".join(["0.5 w"] + ops).encode("cp1252")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode())
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_syllabus_pdf(path, modules=6, topics_per_module=8, delimiter="dash",
+                       pages=1, trailing_rows=6, seed=0):
+    """
+    Writes one synthetic syllabus to `path`. `pages` is a minimum: extra
+    filler pages are appended after the syllabus table if needed.
+    Returns the `expected` dict from make_syllabus_rows().
+    """
+    rows, expected = make_syllabus_rows(modules, topics_per_module, delimiter, trailing_rows, seed)
+    write_pdf(path, _layout(rows, min_pages=pages))
+    return expected
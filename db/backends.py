@@ -0,0 +1,163 @@
+"""
+Storage backends. The modules in db/ (course lists, course trees,
+mutations, rollups, versions, the syllabus writer) are written once, in
+the MySQL dialect with %s placeholders. A backend supplies the
+connection and the few SQL fragments that differ between databases.
+
+    DB_BACKEND=mysql    (default) server from DB_HOST / DB_USER / ...
+    DB_BACKEND=sqlite   embedded file at SQLITE_PATH, WAL mode
+
+Create or upgrade the tables for either one with `python -m db.migrations`.
+"""
+import os
+
+from db.sqlite import LOCKING_READ
+
+BACKEND_CONFIG = {
+    "backend": os.environ.get("DB_BACKEND", "mysql"),
+    "sqlite_path": os.environ.get("SQLITE_PATH", "syllabus.db"),
+    "sqlite_busy_timeout": float(os.environ.get("SQLITE_BUSY_TIMEOUT", 5)),
+}
+
+
+def _rows_as_dicts(cursor):
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+class MySQLBackend:
+    name = "mysql"
+    autoincrement_pk = "INT AUTO_INCREMENT PRIMARY KEY"
+    table_options = " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    for_update = " FOR UPDATE"
+
+    def __init__(self, config):
+        self.config = config
+
+    def connect(self):
+        import mysql.connector
+        return mysql.connector.connect(**self.config)
+
+    def increment_sql(self, table, key, column):
+        """INSERT a row with `column` = 1, or add 1 to it if `key` already exists."""
+        return (f"INSERT INTO {table} ({key}, {column}) VALUES (%s, 1) "
+                f"ON DUPLICATE KEY UPDATE {column} = {column} + 1")
+
+    def create_table_sql(self, table, body, indexes=()):
+        """Statements creating `table`; MySQL declares its indexes inline."""
+        lines = [body.strip().rstrip(",")]
+        lines += [f"INDEX {name} ({', '.join(columns)})" for name, columns in indexes]
+        return [f"CREATE TABLE IF NOT EXISTS {table} (\n    " + ",\n    ".join(lines) + f"\n){self.table_options}"]
+
+    def index_exists(self, cursor, table, name):
+        cursor.execute(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+            (table, name)
+        )
+        return cursor.fetchone() is not None
+
+    def drop_index_sql(self, table, name):
+        return f"DROP INDEX {name} ON {table}"
+
+    def column_exists(self, cursor, table, column):
+        cursor.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1",
+            (table, column)
+        )
+        return cursor.fetchone() is not None
+
+    def explain(self, cursor, sql, params=()):
+        """
+        Returns one (table, access, full_scan) tuple per table in the plan.
+        type=ALL is a full table scan; type=index (a full scan of a
+        covering index) and a scan of a derived table (<derived2>, built
+        by an earlier step of the plan) are not counted as one.
+        """
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = []
+        for row in _rows_as_dicts(cursor):
+            table = row.get("table") or ""
+            access = f"type={row.get('type')} key={row.get('key')} {row.get('Extra') or ''}".strip()
+            plan.append((table, access, row.get("type") == "ALL" and not table.startswith("<")))
+        return plan
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    # AUTOINCREMENT: ids of deleted courses are never handed out again
+    # (their version counters and ETags must not be reused)
+    autoincrement_pk = "INTEGER PRIMARY KEY AUTOINCREMENT"
+    table_options = ""
+    # No row locks: a locking read opens the transaction with BEGIN IMMEDIATE
+    # instead (see db/sqlite.py), so writers queue on the busy timeout
+    for_update = LOCKING_READ
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+
+    def connect(self):
+        from db.sqlite import connect
+        return connect(self.path, self.busy_timeout)
+
+    def increment_sql(self, table, key, column):
+        return (f"INSERT INTO {table} ({key}, {column}) VALUES (%s, 1) "
+                f"ON CONFLICT ({key}) DO UPDATE SET {column} = {column} + 1")
+
+    def create_table_sql(self, table, body, indexes=()):
+        statements = [f"CREATE TABLE IF NOT EXISTS {table} (\n    {body.strip().rstrip(',')}\n)"]
+        statements += [f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                       for name, columns in indexes]
+        return statements
+
+    def index_exists(self, cursor, table, name):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND name = %s",
+                       (table, name))
+        return cursor.fetchone() is not None
+
+    def drop_index_sql(self, table, name):
+        return f"DROP INDEX {name}"
+
+    def column_exists(self, cursor, table, column):
+        cursor.execute("SELECT 1 FROM pragma_table_info(%s) WHERE name = %s", (table, column))
+        return cursor.fetchone() is not None
+
+    def explain(self, cursor, sql, params=()):
+        """
+        Returns one (table, access, full_scan) tuple per step of the plan.
+        "SCAN t" is a full table scan; "SCAN t USING COVERING INDEX i"
+        reads only the index and "SCAN t VIRTUAL TABLE INDEX ..." is an
+        FTS5 lookup, so neither is counted as one. Nor is a scan of a
+        subquery result built by an earlier step (MATERIALIZE / CO-ROUTINE).
+        """
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        plan = []
+        derived = set()
+        for row in cursor.fetchall():
+            detail = row[-1]
+            words = detail.split()
+            table = words[1] if len(words) > 1 else ""
+            if words[:1] in (["MATERIALIZE"], ["CO-ROUTINE"]):
+                derived.add(table)
+            full_scan = (words[:1] == ["SCAN"] and table != "CONSTANT" and table not in derived
+                         and " USING " not in detail and " VIRTUAL TABLE " not in detail)
+            plan.append((table, detail, full_scan))
+        return plan
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if BACKEND_CONFIG["backend"] == "sqlite":
+            _backend = SQLiteBackend(BACKEND_CONFIG["sqlite_path"], BACKEND_CONFIG["sqlite_busy_timeout"])
+        elif BACKEND_CONFIG["backend"] == "mysql":
+            from db.connection import DB_CONFIG
+            _backend = MySQLBackend(DB_CONFIG)
+        else:
+            raise ValueError(f"Unknown DB_BACKEND '{BACKEND_CONFIG['backend']}' (expected mysql or sqlite)")
+    return _backend
@@ -0,0 +1,235 @@
+"""
+Streaming export / import of courses as NDJSON (one JSON object per line).
+
+    {"type": "export", "format": 1}
+    {"type": "course", "course_code": "BCSE202L", "course_name": "Data Structures"}
+    {"type": "module", "module_number": 1, "module_name": "Module:1 Basics", "module_hours": 6}
+    {"type": "topic", "topic_name": "Arrays", "completion_status": 40, "importance": 3}
+    ...
+
+A module belongs to the course line before it and a topic to the module
+line before it. Export reads one ordered join with fetchmany() and writes
+each line as its row arrives; import inserts each module when its line
+is read and topics in batches. Memory use stays constant no matter how
+large the backup is.
+
+Each imported course is committed on its own once its last line is read,
+so an error part way through keeps the courses before it and rolls back
+only the one being read.
+
+    python -m db.backup export [--course ID ...] [-o backup.ndjson]
+    python -m db.backup import backup.ndjson        # "-" reads stdin
+"""
+import argparse
+import json
+import sys
+
+from db import rollups, versions
+from db.syllabus_writer import INSERT_BATCH_SIZE, MODULE_INSERT_SQL, TOPIC_INSERT_SQL
+
+FORMAT_VERSION = 1
+FETCH_SIZE = 500
+
+EXPORT_SQL = """
+    SELECT
+        C.course_id, C.course_code, C.course_name,
+        M.module_id, M.module_number, M.module_name, M.module_hours,
+        T.topic_id, T.topic_name, T.completion_status, T.importance
+    FROM
+        Course C
+    LEFT JOIN
+        Module M ON M.course_id = C.course_id
+    LEFT JOIN
+        Topics T ON T.module_id = M.module_id
+    {where}
+    ORDER BY
+        C.course_id, M.module_id, T.topic_id
+"""
+
+
+class BackupFormatError(ValueError):
+    """
+    An import line that can't be read. Carries its 1-based line number and
+    the ids of the courses committed before it (`imported`).
+    """
+
+    def __init__(self, line_number, message):
+        super().__init__(f"Line {line_number}: {message}")
+        self.line_number = line_number
+        self.imported = []
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_lines(cursor, course_ids=None):
+    """
+    Yields the NDJSON lines of the given courses (default: all of them).
+    `cursor` must be a dictionary cursor and stays busy until the last line.
+    """
+    if course_ids:
+        where = f"WHERE C.course_id IN ({', '.join(['%s'] * len(course_ids))})"
+        cursor.execute(EXPORT_SQL.format(where=where), tuple(course_ids))
+    else:
+        cursor.execute(EXPORT_SQL.format(where=""))
+
+    yield _line({"type": "export", "format": FORMAT_VERSION})
+    course_id = module_id = None
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            if row["course_id"] != course_id:
+                course_id, module_id = row["course_id"], None
+                yield _line({"type": "course", "course_code": row["course_code"],
+                             "course_name": row["course_name"]})
+            if row["module_id"] is not None and row["module_id"] != module_id:
+                module_id = row["module_id"]
+                yield _line({"type": "module", "module_number": row["module_number"],
+                             "module_name": row["module_name"], "module_hours": row["module_hours"]})
+            if row["topic_id"] is not None:
+                yield _line({"type": "topic", "topic_name": row["topic_name"],
+                             "completion_status": row["completion_status"] or 0,
+                             "importance": row["importance"] or 0})
+
+
+def _records(lines):
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise BackupFormatError(line_number, f"not valid JSON ({e})")
+        if not isinstance(record, dict) or record.get("type") not in ("export", "course", "module", "topic"):
+            raise BackupFormatError(line_number, "expected an export, course, module or topic object")
+        yield line_number, record
+
+
+def _require(record, field, line_number, kind=str):
+    value = record.get(field)
+    if value is None or value == "":
+        raise BackupFormatError(line_number, f"{record['type']} needs '{field}'")
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise BackupFormatError(line_number, f"'{field}' must be a {kind.__name__}")
+
+
+def _optional_int(record, field, line_number):
+    return _require(record, field, line_number, int) if record.get(field) not in (None, "") else 0
+
+
+def import_lines(db, lines, batch_size=INSERT_BATCH_SIZE):
+    """
+    Creates the courses read from NDJSON `lines` (any iterable of str).
+    Commits after each course and returns the new course ids. Raises
+    BackupFormatError on a bad line, after rolling back the current course.
+    """
+    course_ids = []
+    course_id = module_id = None
+    topics = []
+
+    def flush_topics(cursor):
+        if topics:
+            cursor.executemany(TOPIC_INSERT_SQL, topics)
+            topics.clear()
+
+    def finish_course(cursor):
+        flush_topics(cursor)
+        rollups.add_course_totals(cursor, course_id)
+        versions.bump(cursor, course_id, course_list=True)
+        db.commit()
+        course_ids.append(course_id)
+
+    try:
+        with db.cursor() as cursor:
+            for line_number, record in _records(lines):
+                kind = record["type"]
+                if kind == "export":
+                    version = _require(record, "format", line_number, int)
+                    if version > FORMAT_VERSION:
+                        raise BackupFormatError(line_number, f"format {version} is newer than this app")
+                elif kind == "course":
+                    if course_id is not None:
+                        finish_course(cursor)
+                    cursor.execute("INSERT INTO Course (course_code, course_name) VALUES (%s, %s)",
+                                   (_require(record, "course_code", line_number),
+                                    _require(record, "course_name", line_number)))
+                    course_id, module_id = cursor.lastrowid, None
+                elif kind == "module":
+                    if course_id is None:
+                        raise BackupFormatError(line_number, "module before any course")
+                    flush_topics(cursor)
+                    cursor.execute(MODULE_INSERT_SQL, (
+                        course_id,
+                        _require(record, "module_number", line_number, int),
+                        _require(record, "module_name", line_number),
+                        _optional_int(record, "module_hours", line_number),
+                    ))
+                    module_id = cursor.lastrowid
+                else:
+                    if module_id is None:
+                        raise BackupFormatError(line_number, "topic before any module")
+                    topics.append((
+                        module_id,
+                        _require(record, "topic_name", line_number),
+                        _optional_int(record, "importance", line_number),
+                        _optional_int(record, "completion_status", line_number),
+                    ))
+                    if len(topics) >= batch_size:
+                        flush_topics(cursor)
+            if course_id is not None:
+                finish_course(cursor)
+    except BackupFormatError as e:
+        db.rollback()
+        e.imported = course_ids
+        raise
+    except Exception:
+        db.rollback()
+        raise
+    return course_ids
+
+
+def main(argv=None):
+    from db.connection import get_db_connection
+
+    parser = argparse.ArgumentParser(prog="python -m db.backup", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write courses as NDJSON")
+    export.add_argument("--course", type=int, action="append", dest="course_ids",
+                        help="course id to export (repeatable; default: all courses)")
+    export.add_argument("-o", "--output", default="-", help="file to write (default: stdout)")
+    restore = commands.add_parser("import", help="create courses from an NDJSON export")
+    restore.add_argument("path", help="file to read, or - for stdin")
+    args = parser.parse_args(argv)
+
+    with get_db_connection() as db:
+        if args.command == "export":
+            out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+            try:
+                with db.cursor(dictionary=True) as cursor:
+                    out.writelines(export_lines(cursor, args.course_ids))
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            return 0
+
+        source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+        try:
+            course_ids = import_lines(db, source)
+        except BackupFormatError as e:
+            print(f"Import stopped: {e}. Kept {len(e.imported)} course(s) imported before it.", file=sys.stderr)
+            return 1
+        finally:
+            if source is not sys.stdin:
+                source.close()
+    print(f"Imported {len(course_ids)} course(s): {', '.join(map(str, course_ids)) or '-'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
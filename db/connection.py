@@ -1,9 +1,104 @@
-import mysql.connector
+import os
+import threading
+from db.backends import get_backend
+from db.pool import ConnectionPool
+from monitoring.metrics import InstrumentedCursor
+
+# --- MySQL connection settings (override with environment variables) ---
+# DB_BACKEND=sqlite uses an embedded file instead, see db/backends.py
+DB_CONFIG = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "user": os.environ.get("DB_USER", "root"),
+    "password": os.environ.get("DB_PASSWORD", "Absolute@Void11"),  # change if needed
+    "database": os.environ.get("DB_NAME", "SYLLABUS"),
+}
+
+# --- Pool settings ---
+POOL_CONFIG = {
+    "size": int(os.environ.get("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10)),
+    "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+    "pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") != "0",
+    # Times every query for /metrics
+    "wrap_cursor": InstrumentedCursor,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _connect():
+    return get_backend().connect()
+
+
+def init_pool(**overrides):
+    """
+    (Re)creates the shared connection pool. Any POOL_CONFIG key can be
+    overridden, e.g. init_pool(size=10, timeout=5).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.dispose()
+        _pool = ConnectionPool(_connect, **{**POOL_CONFIG, **overrides})
+        return _pool
+
+
+def configure_db(db=None, pool=None):
+    """
+    Applies connection (DB_CONFIG) and pool (POOL_CONFIG) settings, e.g.
+    from create_app(). An existing pool is closed; the next
+    get_db_connection() builds one with the new settings.
+    """
+    DB_CONFIG.update(db or {})
+    POOL_CONFIG.update(pool or {})
+    close_pool()
+
+
+def close_pool():
+    """Closes the pool's idle connections (borrowed ones close when returned)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.dispose()
+            _pool = None
+
+
+def reset_pool_after_fork():
+    """
+    Forgets the pool inherited from a parent process without closing it
+    (closing would tear down sockets the parent is still using). The next
+    get_db_connection() in this process builds a fresh pool.
+    """
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect, **POOL_CONFIG)
+    return _pool
+
 
 def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="Absolute@Void11",  # change if needed
-        database="SYLLABUS"
-    )
+    """
+    Borrows a connection from the shared pool.
+
+    Use it as a context manager so the connection always goes back:
+
+        with get_db_connection() as db:
+            cursor = db.cursor()
+            ...
+            db.commit()
+
+    Calling db.close() also returns it to the pool.
+    """
+    return get_pool().connect()
+
+
+def pool_stats():
+    return get_pool().stats()
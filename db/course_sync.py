@@ -0,0 +1,120 @@
+"""
+Compact course payloads for /api/course/<id> and the change tracking
+behind its ?since=<version> deltas.
+
+Every write stamps the Module / Topics rows it touches with the course's
+new content version (db/versions.py) in `changed_version`, and records
+deleted rows in ContentTombstone. A client holding version N asks for
+?since=N and gets only the rows stamped after N, the ids deleted after
+N, and fresh completion figures for the modules those affect.
+
+Payloads are columnar: one list per field instead of one dict per row,
+so field names are sent once rather than once per topic.
+
+    {"course": {...}, "version": 12,
+     "modules": {"module_id": [4, 5], "module_name": [...], "completion": [62.5, 0.0], ...},
+     "topics":  {"topic_id": [31, 32], "module_id": [4, 4], "topic_name": [...], ...},
+     "since": 10, "deleted": {"module_id": [], "topic_id": [30]}}      # deltas only
+
+The columns and table are added by migration 004 (`python -m db.migrations`).
+"""
+MODULE_FIELDS = ("module_id", "module_number", "module_name", "module_hours", "completion", "topic_count")
+TOPIC_FIELDS = ("topic_id", "module_id", "topic_name", "completion_status", "importance")
+
+TOMBSTONE_TABLE = ("ContentTombstone", """
+    tombstone_id {pk},
+    course_id INT NOT NULL,
+    version BIGINT NOT NULL,
+    kind VARCHAR(10) NOT NULL,
+    item_id INT NOT NULL,
+    module_id INT,
+    FOREIGN KEY (course_id) REFERENCES Course(course_id) ON DELETE CASCADE
+""", (("idx_tombstone_course_version", ("course_id", "version")),))
+
+# The new version is read in the same statement, after versions.bump()
+STAMP_SQL = (
+    "UPDATE {table} SET changed_version = "
+    "(SELECT version FROM ContentVersion WHERE course_id = %s) WHERE {key} IN ({ids})"
+)
+TOMBSTONE_SQL = (
+    "INSERT INTO ContentTombstone (course_id, version, kind, item_id, module_id) "
+    "SELECT course_id, version, %s, %s, %s FROM ContentVersion WHERE course_id = %s"
+)
+TOMBSTONES_SQL = "SELECT kind, item_id, module_id FROM ContentTombstone WHERE course_id = %s AND version > %s"
+
+
+def create_tombstone_table(cursor, backend):
+    table, body, indexes = TOMBSTONE_TABLE
+    for sql in backend.create_table_sql(table, body.format(pk=backend.autoincrement_pk), indexes):
+        cursor.execute(sql)
+
+
+def stamp(cursor, course_id, topics=(), modules=()):
+    """Marks rows as changed in the course's current version. Call after versions.bump()."""
+    for table, key, ids in (("Topics", "topic_id", topics), ("Module", "module_id", modules)):
+        if ids:
+            sql = STAMP_SQL.format(table=table, key=key, ids=", ".join(["%s"] * len(ids)))
+            cursor.execute(sql, (course_id, *ids))
+
+
+def tombstone(cursor, course_id, kind, item_id, module_id=None):
+    """Records that a "module" or "topic" was deleted in the course's current version."""
+    cursor.execute(TOMBSTONE_SQL, (kind, item_id, module_id, course_id))
+
+
+def deleted_since(cursor, course_id, since):
+    """(kind, item_id, module_id) of rows deleted after version `since`."""
+    cursor.execute(TOMBSTONES_SQL, (course_id, since))
+    return [tuple(row.values()) if isinstance(row, dict) else tuple(row) for row in cursor.fetchall()]
+
+
+def _completion(topics):
+    if not topics:
+        return 0.0
+    return round(sum(t["completion_status"] or 0 for t in topics) / len(topics), 1)
+
+
+def _columns(rows, fields):
+    return {field: [row[field] for row in rows] for field in fields}
+
+
+def course_payload(course, module_data, version, since=None, deleted=(), pending=()):
+    """
+    Columnar payload for a course tree (as returned by load_course_tree()).
+
+    With `since`, only topics stamped after it or listed in `pending`
+    (buffered, not written yet, see db/write_behind.py), and the modules
+    that changed or contain a changed or deleted topic. `deleted` are
+    tombstones from deleted_since(). Course totals are always included.
+    """
+    all_topics = [topic for block in module_data for topic in block["topics"]]
+    touched = {module_id for kind, _, module_id in deleted if kind == "topic"}
+    modules, topics = [], []
+    for block in module_data:
+        module, block_topics = block["module"], block["topics"]
+        changed = [t for t in block_topics
+                   if since is None or t["changed_version"] > since or t["topic_id"] in pending]
+        if since is None or changed or module["changed_version"] > since or module["module_id"] in touched:
+            modules.append({**module, "completion": _completion(block_topics), "topic_count": len(block_topics)})
+        topics.extend(changed)
+
+    payload = {
+        "course": {
+            "course_id": course["course_id"],
+            "course_name": course["course_name"],
+            "course_code": course["course_code"],
+            "module_count": len(module_data),
+            "topic_count": len(all_topics),
+            "completion": _completion(all_topics),
+        },
+        "version": version,
+        "modules": _columns(modules, MODULE_FIELDS),
+        "topics": _columns(topics, TOPIC_FIELDS),
+    }
+    if since is not None:
+        payload["since"] = since
+        payload["deleted"] = {
+            "module_id": [item_id for kind, item_id, _ in deleted if kind == "module"],
+            "topic_id": [item_id for kind, item_id, _ in deleted if kind == "topic"],
+        }
+    return payload
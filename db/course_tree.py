@@ -0,0 +1,75 @@
+"""
+Loads a whole course -> modules -> topics tree with a fixed number of queries.
+
+The dashboard used to run one query per module to fetch its topics (N+1).
+Here the modules and their topics come back from a single LEFT JOIN,
+ordered so the nested structure can be built in one pass. The cost is
+always two round-trips, no matter how many modules the course has.
+"""
+
+MODULE_COLUMNS = ("module_id", "course_id", "module_number", "module_name", "module_hours", "changed_version")
+TOPIC_COLUMNS = ("topic_id", "module_id", "topic_name", "completion_status", "importance")
+
+COURSE_SQL = "SELECT * FROM Course WHERE course_id = %s"
+
+TREE_SQL = """
+    SELECT
+        M.module_id, M.course_id, M.module_number, M.module_name, M.module_hours,
+        M.changed_version,
+        T.topic_id, T.topic_name, T.completion_status, T.importance,
+        T.changed_version AS topic_changed_version
+    FROM
+        Module M
+    LEFT JOIN
+        Topics T ON T.module_id = M.module_id
+    WHERE
+        M.course_id = %s
+    ORDER BY
+        M.module_id, T.topic_id
+"""
+
+
+def build_module_data(rows):
+    """
+    Folds flat (module + topic) join rows into the nested structure the
+    dashboard template expects:
+
+        [{"module": {...}, "topics": [{...}, ...]}, ...]
+
+    Rows must be ordered by module_id. A module without topics shows up
+    once with topic_id = NULL (from the LEFT JOIN) and gets an empty list.
+    """
+    module_data = []
+    current_id = None
+    topics = None
+    for row in rows:
+        if row["module_id"] != current_id:
+            current_id = row["module_id"]
+            topics = []
+            module_data.append({
+                "module": {col: row[col] for col in MODULE_COLUMNS},
+                "topics": topics,
+            })
+        if row["topic_id"] is not None:
+            topic = {col: row[col] for col in TOPIC_COLUMNS}
+            # Stamped by every write (see db/course_sync.py)
+            topic["changed_version"] = row["topic_changed_version"]
+            topics.append(topic)
+    return module_data
+
+
+def load_course_tree(db, course_id):
+    """
+    Returns (course, module_data) for a course, or (None, []) if it does
+    not exist. `db` is a connection from get_db_connection().
+    """
+    with db.cursor(dictionary=True) as cursor:
+        cursor.execute(COURSE_SQL, (course_id,))
+        course = cursor.fetchone()
+        if not course:
+            return None, []
+
+        cursor.execute(TREE_SQL, (course_id,))
+        module_data = build_module_data(cursor.fetchall())
+
+    return course, module_data
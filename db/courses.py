@@ -0,0 +1,72 @@
+"""
+Course list for the home page, one page at a time.
+
+Pages use keyset pagination on (course_name, course_id): the next page
+starts after the last row of the previous one, so every page is an
+index range read (idx_course_name_id) no matter how deep it is, unlike
+OFFSET which reads and discards all earlier rows.
+"""
+import base64
+import json
+import os
+
+PAGE_SIZE = int(os.environ.get("COURSE_PAGE_SIZE", 25))
+
+# Reads the precomputed completion rollup for each course (maintained by
+# db/mutations.py, see db/rollups.py). `* 1.0` keeps the division
+# fractional on SQLite, where int / int truncates.
+COURSE_PAGE_SQL = """
+    SELECT
+        C.course_id,
+        C.course_name AS COURSE_NAME,
+        C.course_code,
+        COALESCE(CP.topic_count, 0) AS topic_count,
+        COALESCE(CP.completion_sum * 1.0 / NULLIF(CP.topic_count, 0), 0) AS completion_percentage
+    FROM
+        Course C
+    LEFT JOIN
+        CourseProgress CP ON CP.course_id = C.course_id
+    {where}
+    ORDER BY
+        C.course_name, C.course_id
+    LIMIT %s
+"""
+FIRST_PAGE_SQL = COURSE_PAGE_SQL.format(where="")
+NEXT_PAGE_SQL = COURSE_PAGE_SQL.format(
+    where="WHERE C.course_name > %s OR (C.course_name = %s AND C.course_id > %s)"
+)
+
+
+def encode_cursor(row):
+    """Opaque `after` token pointing just past `row`."""
+    raw = json.dumps([row["COURSE_NAME"], row["course_id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """(course_name, course_id) from an `after` token. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        name, course_id = json.loads(raw)
+        return str(name), int(course_id)
+    except Exception:
+        raise ValueError("Invalid page cursor")
+
+
+def list_courses_page(cursor, after=None, limit=PAGE_SIZE):
+    """
+    One page of courses with their completion_percentage, ordered by name.
+    `after` is a token from a previous page (None for the first page).
+    Returns (courses, token for the next page or None on the last page).
+    `cursor` must be a dictionary cursor.
+    """
+    if after:
+        name, course_id = decode_cursor(after)
+        cursor.execute(NEXT_PAGE_SQL, (name, name, course_id, limit + 1))
+    else:
+        cursor.execute(FIRST_PAGE_SQL, (limit + 1,))
+    courses = cursor.fetchall()
+    if len(courses) > limit:
+        courses = courses[:limit]
+        return courses, encode_cursor(courses[-1])
+    return courses, None
@@ -0,0 +1,210 @@
+"""
+Versioned schema migrations plus a query-plan check for the hot queries.
+
+Applied versions are recorded in SchemaMigrations. Each step is safe to
+re-run (MySQL DDL is not transactional, so a step that failed half way
+is simply applied again).
+
+    python -m db.migrations            # same as upgrade
+    python -m db.migrations upgrade    # apply pending migrations
+    python -m db.migrations status     # list applied / pending versions
+    python -m db.migrations check      # EXPLAIN every app query; exit 1 on a hot full table scan
+
+Add a schema change by appending a new (version, name, function) entry
+to MIGRATIONS; never edit one that has shipped.
+"""
+import sys
+
+from db import backup, course_sync, course_tree, courses, mutations, rollups, search, syllabus_writer, versions
+from db.backends import get_backend
+from db.schema import create_tables
+
+MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS SchemaMigrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _create_index(cursor, backend, table, name, columns):
+    if not backend.index_exists(cursor, table, name):
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+
+
+def _drop_index(cursor, backend, table, name):
+    if backend.index_exists(cursor, table, name):
+        cursor.execute(backend.drop_index_sql(table, name))
+
+
+def _initial_tables(cursor, backend):
+    # Tables, foreign keys (ON DELETE CASCADE) and basic indexes from db/schema.py
+    create_tables(cursor, backend=backend)
+
+
+# (table, index, columns) for the hot access paths
+COVERING_INDEXES = (
+    # Dashboard tree: WHERE course_id = ? ORDER BY module_id
+    ("Module", "idx_module_course_module", ("course_id", "module_id")),
+    # add_module: MAX(module_number) WHERE course_id = ? (answered from the index alone)
+    ("Module", "idx_module_course_number", ("course_id", "module_number")),
+    # Tree join ON module_id ORDER BY topic_id; also covers the COUNT/SUM
+    # per module used by the rollup rebuild
+    ("Topics", "idx_topics_module_topic", ("module_id", "topic_id", "completion_status")),
+    # Home page keyset pages: WHERE course_name > ? OR (course_name = ? AND course_id > ?)
+    # ORDER BY course_name, course_id, read from the index alone
+    ("Course", "idx_course_name_id", ("course_name", "course_id", "course_code")),
+)
+# Single-column indexes that are prefixes of the ones above
+SUPERSEDED_INDEXES = (
+    ("Module", "idx_module_course"),
+    ("Topics", "idx_topics_module"),
+)
+
+
+def _covering_indexes(cursor, backend):
+    # Create the replacements first: MySQL won't drop an index a foreign key still needs
+    for table, name, columns in COVERING_INDEXES:
+        _create_index(cursor, backend, table, name, columns)
+    for table, name in SUPERSEDED_INDEXES:
+        _drop_index(cursor, backend, table, name)
+
+
+def _search_index(cursor, backend):
+    # FULLTEXT indexes (MySQL) or FTS5 tables + triggers (SQLite), see db/search.py
+    search.create_search_index(cursor, backend)
+
+
+def _change_tracking(cursor, backend):
+    # Row stamps and tombstones for /api/course?since= deltas, see db/course_sync.py
+    for table in ("Module", "Topics"):
+        if not backend.column_exists(cursor, table, "changed_version"):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN changed_version BIGINT NOT NULL DEFAULT 0")
+    course_sync.create_tombstone_table(cursor, backend)
+
+
+def _fill_rollups(cursor, backend):
+    # Migration 001 creates CourseProgress / ModuleProgress empty; on a
+    # database that already had courses they must be computed once
+    rollups.rebuild(cursor)
+
+
+MIGRATIONS = (
+    (1, "initial_tables", _initial_tables),
+    (2, "covering_indexes", _covering_indexes),
+    (3, "search_index", _search_index),
+    (4, "change_tracking", _change_tracking),
+    (5, "fill_rollups", _fill_rollups),
+)
+
+
+def applied_versions(cursor):
+    cursor.execute(MIGRATIONS_TABLE_SQL)
+    cursor.execute("SELECT version FROM SchemaMigrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def upgrade(db, out=sys.stdout):
+    """Applies every pending migration in order, committing after each one."""
+    backend = get_backend()
+    with db.cursor() as cursor:
+        done = applied_versions(cursor)
+        db.commit()
+        pending = [m for m in MIGRATIONS if m[0] not in done]
+        for version, name, migrate in pending:
+            print(f"Applying {version:03d} {name}...", file=out)
+            migrate(cursor, backend)
+            cursor.execute("INSERT INTO SchemaMigrations (version, name) VALUES (%s, %s)", (version, name))
+            db.commit()
+    print(f"Schema is at version {MIGRATIONS[-1][0]} ({len(pending)} applied).", file=out)
+    return len(pending)
+
+
+# --- Query plan check ---
+
+# Every query the request path issues: (name, sql, sample params, hot).
+# Hot queries must not full-scan a table; the rest are only reported.
+APP_QUERIES = (
+    ("home: first course page", courses.FIRST_PAGE_SQL, (26,), True),
+    ("home: next course page", courses.NEXT_PAGE_SQL, ("Data", "Data", 1, 26), True),
+    ("home/dashboard: content version", versions.VERSION_SQL, (1,), True),
+    ("dashboard: course", course_tree.COURSE_SQL, (1,), True),
+    ("dashboard: modules + topics", course_tree.TREE_SQL, (1,), True),
+    ("writes: module -> course", mutations.MODULE_COURSE_SQL, (1,), True),
+    ("writes: lock topic", mutations.LOCK_TOPIC_SQL, (1,), True),
+    ("add_module: next module number", mutations.NEXT_MODULE_NUMBER_SQL, (1,), True),
+    ("api/course: deleted since", course_sync.TOMBSTONES_SQL, (1, 0), True),
+    ("rollups: adjust module", rollups.ADJUST_MODULE_SQL, (0, 0, 1), True),
+    ("rollups: adjust course", rollups.ADJUST_COURSE_SQL, (0, 0, 1), True),
+    ("parser: new module ids", syllabus_writer.MODULE_IDS_SQL, (1,), True),
+    ("clone: course", mutations.CLONE_COURSE_SQL, (None, 1), True),
+    ("clone: modules", mutations.CLONE_MODULES_SQL, (2, 1), True),
+    ("clone: topics", mutations.CLONE_TOPICS_SQL.format(completion="T.completion_status"), (1, 2), True),
+    ("rollups: module totals (one course)", rollups.COURSE_MODULE_TOTALS_SQL, (1,), True),
+    ("rollups: course from module totals", rollups.COURSE_FROM_MODULES_SQL, (1, 1), True),
+    ("export: selected courses", backup.EXPORT_SQL.format(where="WHERE C.course_id IN (%s)"), (1,), True),
+    ("rollups: course totals (rebuild)", rollups.COURSE_TOTALS_SQL, (), False),
+    ("rollups: module totals (rebuild)", rollups.MODULE_TOTALS_SQL, (), False),
+    ("export: all courses", backup.EXPORT_SQL.format(where=""), (), False),
+)
+
+
+def app_queries(backend):
+    """APP_QUERIES plus the search queries, whose SQL depends on the backend."""
+    query = search.fulltext_query(["data"], backend)
+    return APP_QUERIES + tuple(
+        (f"search: {kind}", search.search_sql(kind, backend),
+         search.search_params(search.search_sql(kind, backend), query, 20), True)
+        for kind in ("courses", "topics")
+    )
+
+
+def check_query_plans(cursor, out=sys.stdout):
+    """EXPLAINs app_queries(). Returns the names of hot queries that full-scan a table."""
+    backend = get_backend()
+    failures = []
+    for name, sql, params, hot in app_queries(backend):
+        plan = backend.explain(cursor, sql, params)
+        scanned = [table for table, _, full_scan in plan if full_scan]
+        verdict = "ok" if not scanned else ("FULL SCAN" if hot else "full scan (not hot)")
+        print(f"{name:<40} {verdict}", file=out)
+        for table, access, _ in plan:
+            print(f"    {table}: {access}", file=out)
+        if scanned and hot:
+            failures.append(name)
+    return failures
+
+
+def main(argv=None):
+    from db.connection import get_db_connection
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "upgrade"
+    if command not in ("upgrade", "status", "check"):
+        print("Usage: python -m db.migrations [upgrade|status|check]")
+        return 2
+
+    with get_db_connection() as db:
+        if command == "upgrade":
+            upgrade(db)
+            return 0
+
+        with db.cursor() as cursor:
+            if command == "status":
+                done = applied_versions(cursor)
+                for version, name, _ in MIGRATIONS:
+                    print(f"{version:03d} {name:<30} {'applied' if version in done else 'pending'}")
+                return 0
+
+            failures = check_query_plans(cursor)
+    if failures:
+        print(f"\n{len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} do a full table scan: "
+              + ", ".join(failures))
+        return 1
+    print("\nNo hot query does a full table scan.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
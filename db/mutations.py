@@ -0,0 +1,308 @@
+"""
+Every write the app makes to courses, modules and topics.
+
+Each function takes an open cursor and runs inside the caller's
+transaction (the caller commits). Both the single-purpose routes in
+app.py and the /api/batch endpoint go through here, so side effects
+such as the completion rollups, version bumps, change stamps for
+/api/course deltas and course tree cache invalidation are applied the
+same way everywhere.
+
+Bad input raises MutationError, carrying the HTTP status to answer with.
+"""
+from db import course_sync, rollups, versions
+from db.backends import get_backend
+from db.tree_cache import get_tree_cache
+
+# Largest number of operations accepted in one /api/batch request
+MAX_BATCH_OPS = 200
+
+# Lookups run by most writes (also EXPLAIN-checked by `python -m db.migrations check`)
+MODULE_COURSE_SQL = "SELECT course_id FROM Module WHERE module_id = %s"
+NEXT_MODULE_NUMBER_SQL = "SELECT MAX(module_number) FROM Module WHERE course_id = %s"
+# Course cloning: modules are copied in module_id order, so the n-th new
+# module (by id) is the copy of the n-th old one
+CLONE_COURSE_SQL = (
+    "INSERT INTO Course (course_code, course_name) "
+    "SELECT course_code, COALESCE(%s, course_name) FROM Course WHERE course_id = %s"
+)
+CLONE_MODULES_SQL = (
+    "INSERT INTO Module (course_id, module_number, module_name, module_hours) "
+    "SELECT %s, module_number, module_name, module_hours FROM Module WHERE course_id = %s ORDER BY module_id"
+)
+CLONE_TOPICS_SQL = """
+    INSERT INTO Topics (module_id, topic_name, completion_status, importance)
+    SELECT NM.module_id, T.topic_name, {completion}, T.importance
+    FROM Topics T
+    JOIN (SELECT module_id, ROW_NUMBER() OVER (ORDER BY module_id) AS position
+          FROM Module WHERE course_id = %s) OM ON OM.module_id = T.module_id
+    JOIN (SELECT module_id, ROW_NUMBER() OVER (ORDER BY module_id) AS position
+          FROM Module WHERE course_id = %s) NM ON NM.position = OM.position
+    ORDER BY T.topic_id
+"""
+LOCK_TOPIC_SQL = (
+    "SELECT T.module_id, M.course_id, T.completion_status FROM Topics T "
+    "JOIN Module M ON M.module_id = T.module_id WHERE T.topic_id = %s"
+)
+
+
+class MutationError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _require(value, message):
+    if value is None or value == "":
+        raise MutationError(message)
+    return value
+
+
+def _as_int(value, name, required=True):
+    if value is None or value == "":
+        if required:
+            raise MutationError(f"{name} is required")
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise MutationError(f"{name} must be a number")
+
+
+def _module_course(cursor, module_id):
+    # Locked: every caller goes on to write the module or its topics
+    cursor.execute(MODULE_COURSE_SQL + get_backend().for_update, (module_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise MutationError("Module not found", 404)
+    return row[0]
+
+
+def _changed(cursor, course_id, course_list=False, topics=(), modules=(), deleted=()):
+    """
+    Marks a course's dashboard (and optionally the home page list) as
+    changed. The `topics` / `modules` ids written and the (kind, id,
+    module_id) rows `deleted` are recorded under the new version.
+    """
+    versions.bump(cursor, course_id, course_list=course_list)
+    course_sync.stamp(cursor, course_id, topics, modules)
+    for kind, item_id, module_id in deleted:
+        course_sync.tombstone(cursor, course_id, kind, item_id, module_id)
+    get_tree_cache().invalidate(course_id)
+
+
+# --- Courses ---
+
+def add_course(cursor, course_name, course_code):
+    _require(course_name, "Course name and code are required.")
+    _require(course_code, "Course name and code are required.")
+    cursor.execute(
+        "INSERT INTO Course (COURSE_NAME, course_code) VALUES (%s, %s)",
+        (course_name, course_code)
+    )
+    course_id = cursor.lastrowid # Get the ID of the new course
+    rollups.add_course(cursor, course_id)
+    _changed(cursor, course_id, course_list=True)
+    return {"course_id": course_id}
+
+
+def update_course(cursor, course_id, course_name, course_code):
+    _require(course_name, "Course name and code cannot be empty.")
+    _require(course_code, "Course name and code cannot be empty.")
+    cursor.execute(
+        "UPDATE Course SET COURSE_NAME = %s, course_code = %s WHERE course_id = %s",
+        (course_name, course_code, course_id)
+    )
+    _changed(cursor, course_id, course_list=True)
+    return {"course_id": course_id}
+
+
+def clone_course(cursor, course_id, course_name=None, reset_progress=False):
+    """
+    Copies a course with its modules and topics in three INSERT ... SELECT
+    statements, none of the rows passing through Python. The copy keeps
+    the name unless `course_name` is given; `reset_progress` starts every
+    topic at 0% (importance is kept).
+    """
+    cursor.execute(CLONE_COURSE_SQL, (course_name or None, course_id))
+    if cursor.rowcount == 0:
+        raise MutationError("Course not found", 404)
+    new_id = cursor.lastrowid
+    cursor.execute(CLONE_MODULES_SQL, (new_id, course_id))
+    completion = "0" if reset_progress else "T.completion_status"
+    cursor.execute(CLONE_TOPICS_SQL.format(completion=completion), (course_id, new_id))
+    rollups.add_course_totals(cursor, new_id)
+    _changed(cursor, new_id, course_list=True)
+    return {"course_id": new_id, "source_course_id": course_id}
+
+
+def delete_course(cursor, course_id):
+    # CASCADE removes modules, topics and rollup rows
+    cursor.execute("DELETE FROM Course WHERE course_id = %s", (course_id,))
+    versions.forget(cursor, course_id)
+    get_tree_cache().invalidate(course_id)
+    versions.bump(cursor, course_list=True)
+    return {"course_id": course_id}
+
+
+# --- Modules ---
+
+def add_module(cursor, course_id, module_name, module_hours=0):
+    _require(module_name, "Module name cannot be empty.")
+    module_hours = _as_int(module_hours, "Module hours", required=False) or 0
+
+    # --- Determine the next module number ---
+    cursor.execute(NEXT_MODULE_NUMBER_SQL + get_backend().for_update, (course_id,))
+    next_module_number = (cursor.fetchone()[0] or 0) + 1
+
+    cursor.execute(
+        "INSERT INTO Module (course_id, module_number, Module_name, Module_hours) VALUES (%s, %s, %s, %s)",
+        (course_id, next_module_number, module_name, module_hours)
+    )
+    module_id = cursor.lastrowid
+    rollups.add_modules(cursor, course_id, [(module_id, 0, 0)])
+    _changed(cursor, course_id, modules=[module_id])
+    return {"module_id": module_id, "course_id": course_id}
+
+
+def update_module(cursor, module_id, module_name, module_hours):
+    course_id = _module_course(cursor, module_id)
+    cursor.execute(
+        "UPDATE Module SET module_name = %s, module_hours = %s WHERE module_id = %s",
+        (module_name, module_hours, module_id)
+    )
+    _changed(cursor, course_id, modules=[module_id])
+    return {"module_id": module_id}
+
+
+def delete_module(cursor, module_id):
+    """Deletes a module and its topics (due to CASCADE). Returns its course_id."""
+    course_id = _module_course(cursor, module_id)
+    rollups.remove_module(cursor, module_id)
+    cursor.execute("DELETE FROM Module WHERE module_id = %s", (module_id,))
+    _changed(cursor, course_id, course_list=True, deleted=[("module", module_id, module_id)])
+    return {"module_id": module_id, "course_id": course_id}
+
+
+# --- Topics ---
+
+def find_topic(cursor, topic_id, lock=False):
+    """
+    Returns (module_id, course_id, completion_status) of a topic. With
+    `lock` the row stays locked until the caller's transaction ends.
+    """
+    cursor.execute(LOCK_TOPIC_SQL + (get_backend().for_update if lock else ""), (topic_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise MutationError("Topic not found", 404)
+    return row[0], row[1], row[2] or 0
+
+
+def topic_stats(completion, importance):
+    """Validated (completion, importance) as accepted by update_topic_stats()."""
+    return _as_int(completion, "Completion"), _as_int(importance, "Importance", required=False)
+
+
+def update_topic_stats(cursor, topic_id, completion, importance):
+    completion, importance = topic_stats(completion, importance)
+    # Old value is needed to adjust the completion rollups
+    module_id, course_id, old_completion = find_topic(cursor, topic_id, lock=True)
+    cursor.execute(
+        "UPDATE Topics SET completion_status = %s, importance = %s WHERE topic_id = %s",
+        (completion, importance, topic_id)
+    )
+    rollups.adjust_module(cursor, module_id, completion=completion - old_completion)
+    # The home page only shows completion, so it changes only if that did
+    _changed(cursor, course_id, course_list=completion != old_completion, topics=[topic_id])
+    return {"topic_id": topic_id}
+
+
+def rename_topic(cursor, topic_id, topic_name):
+    _require(topic_name, "Topic name cannot be empty")
+    module_id, course_id, _ = find_topic(cursor, topic_id, lock=True)
+    cursor.execute(
+        "UPDATE Topics SET topic_name = %s WHERE topic_id = %s",
+        (topic_name, topic_id)
+    )
+    _changed(cursor, course_id, topics=[topic_id])
+    return {"topic_id": topic_id}
+
+
+def delete_topic(cursor, topic_id):
+    module_id, course_id, old_completion = find_topic(cursor, topic_id, lock=True)
+    cursor.execute("DELETE FROM Topics WHERE topic_id = %s", (topic_id,))
+    rollups.adjust_module(cursor, module_id, topics=-1, completion=-old_completion)
+    _changed(cursor, course_id, course_list=True, deleted=[("topic", topic_id, module_id)])
+    return {"topic_id": topic_id}
+
+
+def add_topic(cursor, module_id, topic_name):
+    _require(topic_name, "Topic name cannot be empty")
+    course_id = _module_course(cursor, module_id)
+    cursor.execute(
+        "INSERT INTO Topics (module_id, topic_name, completion_status, importance) VALUES (%s, %s, 0, 0)",
+        (module_id, topic_name)
+    )
+    topic_id = cursor.lastrowid
+    rollups.adjust_module(cursor, module_id, topics=1)
+    _changed(cursor, course_id, course_list=True, topics=[topic_id])
+    return {"topic_id": topic_id, "module_id": module_id}
+
+
+# --- Batches ---
+
+# op name -> (function, JSON fields passed as arguments, in order)
+BATCH_OPS = {
+    "update_topic_stats": (update_topic_stats, ("topic_id", "completion", "importance")),
+    "rename_topic": (rename_topic, ("topic_id", "topic_name")),
+    "delete_topic": (delete_topic, ("topic_id",)),
+    "add_topic": (add_topic, ("module_id", "topic_name")),
+    "update_module": (update_module, ("module_id", "module_name", "module_hours")),
+    "add_module": (add_module, ("course_id", "module_name", "module_hours")),
+    "delete_module": (delete_module, ("module_id",)),
+}
+
+ID_FIELDS = ("topic_id", "module_id", "course_id")
+
+
+def apply_batch(cursor, ops, overrides=None):
+    """
+    Applies a list of {"op": ..., <fields>} dicts. Each op runs inside its
+    own SAVEPOINT, so a failing op is undone on its own and the rest still
+    apply when the caller commits. Returns one result dict per op, in order:
+
+        {"index": 0, "op": "rename_topic", "ok": true, "topic_id": 7}
+        {"index": 1, "op": "delete_topic", "ok": false, "status": 404, "error": "Topic not found"}
+
+    `overrides` maps op names to replacement functions taking the same
+    arguments (used to send update_topic_stats to the write-behind buffer).
+    """
+    if not isinstance(ops, list):
+        raise MutationError("Expected a list of operations")
+    if len(ops) > MAX_BATCH_OPS:
+        raise MutationError(f"At most {MAX_BATCH_OPS} operations per batch", 413)
+
+    results = []
+    for index, op in enumerate(ops):
+        name = op.get("op") if isinstance(op, dict) else None
+        result = {"index": index, "op": name}
+        cursor.execute("SAVEPOINT batch_op")
+        try:
+            if name not in BATCH_OPS:
+                raise MutationError(f"Unknown operation '{name}'")
+            fn, fields = BATCH_OPS[name]
+            fn = (overrides or {}).get(name, fn)
+            args = [_as_int(op.get(field), field) if field in ID_FIELDS else op.get(field)
+                    for field in fields]
+            result.update(fn(cursor, *args) or {})
+            result["ok"] = True
+            cursor.execute("RELEASE SAVEPOINT batch_op")
+        except MutationError as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT batch_op")
+            result.update(ok=False, status=e.status, error=str(e))
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT batch_op")
+            print(f"Error in batch op {index} ({name}): {e}")
+            result.update(ok=False, status=500, error=str(e))
+        results.append(result)
+    return results
@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a raw DB connection borrowed from a ConnectionPool.
+
+    Behaves like the underlying connection (cursor(), commit(), ...), but
+    close() hands it back to the pool instead of closing the socket.
+    Can be used as a context manager: on exit the connection is rolled
+    back if an exception escaped, then returned to the pool.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise RuntimeError("Connection has already been returned to the pool.")
+        return getattr(raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self.__getattr__("cursor")(*args, **kwargs)
+        wrap = self._pool.wrap_cursor
+        return wrap(cursor) if wrap else cursor
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._raw is not None:
+            try:
+                self._raw.rollback()
+            except Exception:
+                # Connection is probably broken, don't put it back
+                raw, self._raw = self._raw, None
+                self._pool.release(raw, discard=True)
+                return False
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    A small thread-safe connection pool.
+
+    - `size` connections are kept open and reused.
+    - Up to `max_overflow` extra connections are opened under load and
+      closed again as soon as they are returned.
+    - connect() blocks for at most `timeout` seconds waiting for a free slot.
+    - With `pre_ping`, idle connections are health-checked on borrow and
+      transparently replaced if the server dropped them.
+    - `wrap_cursor`, if given, is applied to every cursor handed out
+      (used to time queries, see monitoring/metrics.py).
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=10.0, pre_ping=True, wrap_cursor=None):
+        self._connect = connect
+        self.wrap_cursor = wrap_cursor
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._closed = False
+
+    def connect(self):
+        """Borrows a connection. Returns a PooledConnection."""
+        deadline = time.monotonic() + self.timeout
+        raw = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool has been closed.")
+                if self._idle:
+                    raw = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1  # Reserve the slot, connect outside the lock
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a DB connection "
+                        f"({self._in_use} in use, pool size {self.size}+{self.max_overflow})."
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+            self._checkouts += 1
+
+        try:
+            if raw is not None and self.pre_ping and not self._is_alive(raw):
+                self._close_quietly(raw)
+                with self._cond:
+                    self._discarded += 1
+                raw = None
+            if raw is None:
+                raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw)
+
+    def release(self, raw, discard=False):
+        """Returns a raw connection to the pool (called by PooledConnection.close)."""
+        if not discard:
+            try:
+                # Never hand out a connection with a half-finished transaction
+                if getattr(raw, "in_transaction", False):
+                    raw.rollback()
+            except Exception:
+                discard = True
+
+        to_close = None
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed or len(self._idle) >= self.size:
+                # Broken, pool shut down, or an overflow connection
+                self._open -= 1
+                if discard:
+                    self._discarded += 1
+                to_close = raw
+            else:
+                self._idle.append(raw)
+            self._cond.notify()
+
+        if to_close is not None:
+            self._close_quietly(to_close)
+
+    def dispose(self):
+        """Closes every idle connection; borrowed ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for raw in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "total_checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+            }
+
+    @staticmethod
+    def _is_alive(raw):
+        try:
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
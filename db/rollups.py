@@ -0,0 +1,180 @@
+"""
+Per-module and per-course completion rollups.
+
+home() used to compute AVG(completion_status) over every topic of every
+course on each page view. Instead, two small tables keep a running
+topic count and completion sum:
+
+    ModuleProgress(module_id, course_id, topic_count, completion_sum)
+    CourseProgress(course_id, topic_count, completion_sum)
+
+Every route that changes topics adjusts them in the same transaction, so
+a course's percentage is just completion_sum / topic_count.
+
+    python -m db.rollups verify    # report drift, exit 1 if any
+    python -m db.rollups rebuild   # create the tables if needed and recompute
+"""
+import sys
+
+from db.backends import get_backend
+from db.schema import create_tables
+
+ADJUST_MODULE_SQL = (
+    "UPDATE ModuleProgress SET topic_count = topic_count + %s, completion_sum = completion_sum + %s "
+    "WHERE module_id = %s"
+)
+ADJUST_COURSE_SQL = (
+    "UPDATE CourseProgress SET topic_count = topic_count + %s, completion_sum = completion_sum + %s "
+    "WHERE course_id = (SELECT course_id FROM ModuleProgress WHERE module_id = %s)"
+)
+
+# Fresh aggregates straight from Topics, used by verify and rebuild
+COURSE_TOTALS_SQL = """
+    SELECT C.course_id, COUNT(T.topic_id), COALESCE(SUM(T.completion_status), 0)
+    FROM Course C
+    LEFT JOIN Module M ON M.course_id = C.course_id
+    LEFT JOIN Topics T ON T.module_id = M.module_id
+    GROUP BY C.course_id
+"""
+MODULE_TOTALS_SQL = """
+    SELECT M.module_id, M.course_id, COUNT(T.topic_id), COALESCE(SUM(T.completion_status), 0)
+    FROM Module M
+    LEFT JOIN Topics T ON T.module_id = M.module_id
+    GROUP BY M.module_id, M.course_id
+"""
+# The same for the modules of one course, and the course row summed from them
+COURSE_MODULE_TOTALS_SQL = """
+    SELECT M.module_id, M.course_id, COUNT(T.topic_id), COALESCE(SUM(T.completion_status), 0)
+    FROM Module M
+    LEFT JOIN Topics T ON T.module_id = M.module_id
+    WHERE M.course_id = %s
+    GROUP BY M.module_id, M.course_id
+"""
+COURSE_FROM_MODULES_SQL = """
+    SELECT %s, COALESCE(SUM(topic_count), 0), COALESCE(SUM(completion_sum), 0)
+    FROM ModuleProgress WHERE course_id = %s
+"""
+
+
+# --- Incremental updates (call inside the caller's transaction) ---
+
+def add_course(cursor, course_id, topic_count=0, completion_sum=0):
+    cursor.execute(
+        "INSERT INTO CourseProgress (course_id, topic_count, completion_sum) VALUES (%s, %s, %s)",
+        (course_id, topic_count, completion_sum)
+    )
+
+
+def add_modules(cursor, course_id, modules):
+    """`modules` is a list of (module_id, topic_count, completion_sum)."""
+    if modules:
+        cursor.executemany(
+            "INSERT INTO ModuleProgress (module_id, course_id, topic_count, completion_sum) VALUES (%s, %s, %s, %s)",
+            [(module_id, course_id, count, total) for module_id, count, total in modules]
+        )
+
+
+def add_course_totals(cursor, course_id):
+    """
+    Creates the rollup rows of a course whose modules and topics were
+    written in bulk (clone, import): two INSERT ... SELECT statements.
+    """
+    cursor.execute("INSERT INTO ModuleProgress (module_id, course_id, topic_count, completion_sum) "
+                   + COURSE_MODULE_TOTALS_SQL, (course_id,))
+    cursor.execute("INSERT INTO CourseProgress (course_id, topic_count, completion_sum) "
+                   + COURSE_FROM_MODULES_SQL, (course_id, course_id))
+
+
+def adjust_module(cursor, module_id, topics=0, completion=0):
+    """Adds `topics` to the topic count and `completion` to the completion sum
+    of a module and of the course it belongs to."""
+    if not topics and not completion:
+        return
+    cursor.execute(ADJUST_MODULE_SQL, (topics, completion, module_id))
+    cursor.execute(ADJUST_COURSE_SQL, (topics, completion, module_id))
+
+
+def remove_module(cursor, module_id):
+    """Subtracts a module's totals from its course. Call before deleting the module
+    (its ModuleProgress row goes with it through ON DELETE CASCADE)."""
+    cursor.execute(
+        "SELECT topic_count, completion_sum FROM ModuleProgress WHERE module_id = %s" + get_backend().for_update,
+        (module_id,)
+    )
+    row = cursor.fetchone()
+    if row:
+        count, total = (row["topic_count"], row["completion_sum"]) if isinstance(row, dict) else row
+        adjust_module(cursor, module_id, -count, -total)
+
+
+# --- Rebuild / verify ---
+
+def ensure_tables(cursor):
+    create_tables(cursor, ("CourseProgress", "ModuleProgress"))
+
+
+def find_drift(cursor):
+    """
+    Compares the stored rollups with totals recomputed from Topics.
+    Returns a list of human-readable drift descriptions (empty = all good).
+    """
+    drift = []
+
+    cursor.execute(COURSE_TOTALS_SQL)
+    expected = {row[0]: (row[1], int(row[2])) for row in cursor.fetchall()}
+    cursor.execute("SELECT course_id, topic_count, completion_sum FROM CourseProgress")
+    stored = {row[0]: (row[1], int(row[2])) for row in cursor.fetchall()}
+    for course_id, totals in expected.items():
+        if stored.get(course_id) != totals:
+            drift.append(f"Course {course_id}: stored {stored.get(course_id)}, actual {totals} (topics, completion sum)")
+    for course_id in stored.keys() - expected.keys():
+        drift.append(f"Course {course_id}: rollup row for a course that no longer exists")
+
+    cursor.execute(MODULE_TOTALS_SQL)
+    expected = {row[0]: (row[1], row[2], int(row[3])) for row in cursor.fetchall()}
+    cursor.execute("SELECT module_id, course_id, topic_count, completion_sum FROM ModuleProgress")
+    stored = {row[0]: (row[1], row[2], int(row[3])) for row in cursor.fetchall()}
+    for module_id, totals in expected.items():
+        if stored.get(module_id) != totals:
+            drift.append(f"Module {module_id}: stored {stored.get(module_id)}, actual {totals} (course, topics, completion sum)")
+    for module_id in stored.keys() - expected.keys():
+        drift.append(f"Module {module_id}: rollup row for a module that no longer exists")
+
+    return drift
+
+
+def rebuild(cursor):
+    """Recomputes every rollup row from scratch."""
+    cursor.execute("DELETE FROM ModuleProgress")
+    cursor.execute("DELETE FROM CourseProgress")
+    cursor.execute("INSERT INTO CourseProgress (course_id, topic_count, completion_sum) " + COURSE_TOTALS_SQL)
+    cursor.execute("INSERT INTO ModuleProgress (module_id, course_id, topic_count, completion_sum) " + MODULE_TOTALS_SQL)
+
+
+def main(argv=None):
+    from db.connection import get_db_connection
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "verify"
+    if command not in ("verify", "rebuild"):
+        print("Usage: python -m db.rollups [verify|rebuild]")
+        return 2
+
+    with get_db_connection() as db, db.cursor() as cursor:
+        if command == "rebuild":
+            ensure_tables(cursor)
+        drift = find_drift(cursor)
+        for line in drift:
+            print(line)
+        print(f"{len(drift)} rollup row(s) out of date.")
+
+        if command == "rebuild":
+            rebuild(cursor)
+            db.commit()
+            print("Rollups rebuilt from Topics.")
+            return 0
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
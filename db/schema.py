@@ -0,0 +1,63 @@
+"""
+Table definitions for every table the app uses, rendered for the
+configured backend (see db/backends.py).
+
+This is the baseline schema (migration 001). Later changes are steps in
+db/migrations.py; run `python -m db.migrations` to create or upgrade.
+"""
+from db.backends import get_backend
+
+# (table, column definitions, indexes as (name, columns)); {pk} is the
+# backend's auto-increment primary key type
+TABLES = (
+    ("Course", """
+        course_id {pk},
+        course_code VARCHAR(50) NOT NULL,
+        course_name VARCHAR(255) NOT NULL
+    """, ()),
+    ("Module", """
+        module_id {pk},
+        course_id INT NOT NULL,
+        module_number INT NOT NULL DEFAULT 0,
+        module_name VARCHAR(255) NOT NULL,
+        module_hours INT NOT NULL DEFAULT 0,
+        FOREIGN KEY (course_id) REFERENCES Course(course_id) ON DELETE CASCADE
+    """, (("idx_module_course", ("course_id",)),)),
+    ("Topics", """
+        topic_id {pk},
+        module_id INT NOT NULL,
+        topic_name VARCHAR(500) NOT NULL,
+        completion_status INT NOT NULL DEFAULT 0,
+        importance INT DEFAULT 0,
+        FOREIGN KEY (module_id) REFERENCES Module(module_id) ON DELETE CASCADE
+    """, (("idx_topics_module", ("module_id",)),)),
+    # Completion rollups, see db/rollups.py
+    ("CourseProgress", """
+        course_id INT PRIMARY KEY,
+        topic_count INT NOT NULL DEFAULT 0,
+        completion_sum BIGINT NOT NULL DEFAULT 0,
+        FOREIGN KEY (course_id) REFERENCES Course(course_id) ON DELETE CASCADE
+    """, ()),
+    ("ModuleProgress", """
+        module_id INT PRIMARY KEY,
+        course_id INT NOT NULL,
+        topic_count INT NOT NULL DEFAULT 0,
+        completion_sum BIGINT NOT NULL DEFAULT 0,
+        FOREIGN KEY (module_id) REFERENCES Module(module_id) ON DELETE CASCADE
+    """, (("idx_module_progress_course", ("course_id",)),)),
+    # Content version counters, see db/versions.py
+    ("ContentVersion", """
+        course_id INT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    """, ()),
+)
+
+
+def create_tables(cursor, tables=None, backend=None):
+    """Creates the named tables (default: all of them) if they don't exist yet."""
+    backend = backend or get_backend()
+    for table, body, indexes in TABLES:
+        if tables is None or table in tables:
+            for sql in backend.create_table_sql(table, body.format(pk=backend.autoincrement_pk), indexes):
+                cursor.execute(sql)
+
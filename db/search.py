@@ -0,0 +1,155 @@
+"""
+Search over course names, course codes and topic names.
+
+Backed by the database's own full-text index instead of LIKE '%...%'
+scans: FULLTEXT indexes on MySQL, FTS5 tables kept in sync by triggers
+on SQLite (both created by migration 003 through create_search_index()).
+Either way the index is maintained by the database on every write,
+including rows removed through ON DELETE CASCADE.
+"""
+import re
+
+from db.backends import get_backend
+
+MAX_RESULTS = 50
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+COURSE_COLUMNS = "C.course_id, C.course_name, C.course_code"
+TOPIC_COLUMNS = "T.topic_id, T.topic_name, M.module_id, M.module_name, C.course_id, C.course_name"
+TOPIC_JOINS = "JOIN Module M ON M.module_id = T.module_id JOIN Course C ON C.course_id = M.course_id"
+
+MYSQL = {
+    # Words shorter than innodb_ft_min_token_size (default 3) are not indexed
+    "min_term": 3,
+    "fulltext_indexes": (
+        ("Course", "ft_course_name_code", ("course_name", "course_code")),
+        ("Topics", "ft_topics_name", ("topic_name",)),
+    ),
+    # Boolean mode doesn't sort by relevance on its own, hence the second MATCH
+    "courses": f"""
+        SELECT {COURSE_COLUMNS}
+        FROM Course C
+        WHERE MATCH(C.course_name, C.course_code) AGAINST (%s IN BOOLEAN MODE)
+        ORDER BY MATCH(C.course_name, C.course_code) AGAINST (%s IN BOOLEAN MODE) DESC, C.course_name
+        LIMIT %s
+    """,
+    "topics": f"""
+        SELECT {TOPIC_COLUMNS}
+        FROM Topics T {TOPIC_JOINS}
+        WHERE MATCH(T.topic_name) AGAINST (%s IN BOOLEAN MODE)
+        ORDER BY MATCH(T.topic_name) AGAINST (%s IN BOOLEAN MODE) DESC, T.topic_id
+        LIMIT %s
+    """,
+}
+
+SQLITE = {
+    "min_term": 1,
+    # External-content FTS5 tables: they index Course / Topics without
+    # storing a second copy of the text; the triggers keep them current.
+    "ddl": (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS CourseSearch USING fts5("
+        "course_name, course_code, content='Course', content_rowid='course_id')",
+        """CREATE TRIGGER IF NOT EXISTS course_search_insert AFTER INSERT ON Course BEGIN
+            INSERT INTO CourseSearch (rowid, course_name, course_code)
+            VALUES (new.course_id, new.course_name, new.course_code);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS course_search_delete AFTER DELETE ON Course BEGIN
+            INSERT INTO CourseSearch (CourseSearch, rowid, course_name, course_code)
+            VALUES ('delete', old.course_id, old.course_name, old.course_code);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS course_search_update AFTER UPDATE OF course_name, course_code ON Course BEGIN
+            INSERT INTO CourseSearch (CourseSearch, rowid, course_name, course_code)
+            VALUES ('delete', old.course_id, old.course_name, old.course_code);
+            INSERT INTO CourseSearch (rowid, course_name, course_code)
+            VALUES (new.course_id, new.course_name, new.course_code);
+        END""",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS TopicSearch USING fts5("
+        "topic_name, content='Topics', content_rowid='topic_id')",
+        """CREATE TRIGGER IF NOT EXISTS topic_search_insert AFTER INSERT ON Topics BEGIN
+            INSERT INTO TopicSearch (rowid, topic_name) VALUES (new.topic_id, new.topic_name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS topic_search_delete AFTER DELETE ON Topics BEGIN
+            INSERT INTO TopicSearch (TopicSearch, rowid, topic_name) VALUES ('delete', old.topic_id, old.topic_name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS topic_search_update AFTER UPDATE OF topic_name ON Topics BEGIN
+            INSERT INTO TopicSearch (TopicSearch, rowid, topic_name) VALUES ('delete', old.topic_id, old.topic_name);
+            INSERT INTO TopicSearch (rowid, topic_name) VALUES (new.topic_id, new.topic_name);
+        END""",
+        # Index the rows that existed before the tables were created
+        "INSERT INTO CourseSearch (CourseSearch) VALUES ('rebuild')",
+        "INSERT INTO TopicSearch (TopicSearch) VALUES ('rebuild')",
+    ),
+    "courses": f"""
+        SELECT {COURSE_COLUMNS}
+        FROM CourseSearch
+        JOIN Course C ON C.course_id = CourseSearch.rowid
+        WHERE CourseSearch MATCH %s
+        ORDER BY CourseSearch.rank, C.course_name
+        LIMIT %s
+    """,
+    "topics": f"""
+        SELECT {TOPIC_COLUMNS}
+        FROM TopicSearch
+        JOIN Topics T ON T.topic_id = TopicSearch.rowid {TOPIC_JOINS}
+        WHERE TopicSearch MATCH %s
+        ORDER BY TopicSearch.rank, T.topic_id
+        LIMIT %s
+    """,
+}
+
+
+def _dialect(backend=None):
+    return SQLITE if (backend or get_backend()).name == "sqlite" else MYSQL
+
+
+def create_search_index(cursor, backend=None):
+    backend = backend or get_backend()
+    if backend.name == "sqlite":
+        for sql in SQLITE["ddl"]:
+            cursor.execute(sql)
+        return
+    for table, name, columns in MYSQL["fulltext_indexes"]:
+        if not backend.index_exists(cursor, table, name):
+            cursor.execute(f"CREATE FULLTEXT INDEX {name} ON {table} ({', '.join(columns)})")
+
+
+def search_terms(text, min_length=1):
+    """The searchable words of a user query, lowercased."""
+    return [w.lower() for w in _WORD.findall(text or "") if len(w) >= min_length]
+
+
+def fulltext_query(terms, backend=None):
+    """Every term required, each matching as a prefix ("dyn prog" finds "Dynamic Programming")."""
+    if _dialect(backend) is SQLITE:
+        return " ".join(f'"{term}"*' for term in terms)
+    return " ".join(f"+{term}*" for term in terms)
+
+
+def search_sql(kind, backend=None):
+    """The SQL for "courses" or "topics" on the configured backend."""
+    return _dialect(backend)[kind]
+
+
+def search_params(sql, query, limit):
+    # The MySQL queries repeat the search string for the ORDER BY
+    return (query,) * (sql.count("%s") - 1) + (limit,)
+
+
+def search(cursor, text, limit=20):
+    """
+    Courses and topics matching every word of `text`, best matches first.
+    Returns {"courses": [...], "topics": [...]}. `cursor` must be a dictionary cursor.
+    """
+    dialect = _dialect()
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    terms = search_terms(text, dialect["min_term"])
+    if not terms:
+        return {"courses": [], "topics": []}
+
+    query = fulltext_query(terms)
+    results = {}
+    for kind in ("courses", "topics"):
+        cursor.execute(dialect[kind], search_params(dialect[kind], query, limit))
+        results[kind] = cursor.fetchall()
+    return results
@@ -0,0 +1,133 @@
+"""
+Makes a sqlite3 connection behave like the mysql.connector connections
+the rest of db/ is written against:
+
+- queries use the %s placeholder style (rewritten to ?),
+- cursor(dictionary=True) returns rows as dicts,
+- cursors work as context managers,
+- a transaction is opened by the first statement and lasts until
+  commit() / rollback(), as with MySQL's autocommit=0.
+
+Connections are opened in WAL mode, so readers never block the writer.
+A transaction whose first statement writes, or is a locking read (a
+SELECT ending in backend.for_update, i.e. LOCKING_READ), starts with
+BEGIN IMMEDIATE: it takes the write lock up front, waiting up to the
+busy timeout for it. A deferred transaction that reads and then writes
+would instead fail with "database is locked" as soon as another writer
+got in between, without waiting.
+"""
+import functools
+import sqlite3
+
+# What SQLiteBackend.for_update appends to a SELECT: SQLite has no row
+# locks, so it marks the transaction as a writer instead
+LOCKING_READ = " /* FOR UPDATE */"
+
+
+@functools.lru_cache(maxsize=512)
+def _translate(sql):
+    return sql.replace("%s", "?")
+
+
+@functools.lru_cache(maxsize=512)
+def _writes(sql):
+    """True if `sql` opening a transaction makes it a write transaction."""
+    if sql.rstrip().endswith(LOCKING_READ.strip()):
+        return True
+    return not sql.lstrip().upper().startswith(("SELECT", "WITH", "PRAGMA", "EXPLAIN"))
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def execute(self, sql, params=()):
+        self._connection.begin(immediate=_writes(sql))
+        self._cursor.execute(_translate(sql), params)
+
+    def executemany(self, sql, rows):
+        self._connection.begin(immediate=True)
+        self._cursor.executemany(_translate(sql), rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class SQLiteConnection:
+    def __init__(self, raw):
+        self.raw = raw
+
+    def begin(self, immediate=False):
+        if not self.raw.in_transaction:
+            self.raw.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def is_connected(self):
+        try:
+            self.raw.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self.raw.close()
+
+
+def connect(path, busy_timeout=5.0):
+    """Opens `path` (created if missing) in WAL mode with foreign keys enforced."""
+    # isolation_level=None: transactions are opened explicitly by begin()
+    raw = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+    raw.execute("PRAGMA journal_mode=WAL")
+    raw.execute("PRAGMA synchronous=NORMAL")
+    raw.execute("PRAGMA foreign_keys=ON")  # Needed for the ON DELETE CASCADEs
+    return SQLiteConnection(raw)
@@ -0,0 +1,109 @@
+"""
+Persists a parsed Syllabus (see parsers/syllabus.py) as a new course.
+The parsing stage never touches the DB; this is the only writer.
+"""
+import contextlib
+import os
+import time
+from db.connection import get_db_connection
+from db import rollups, versions
+from monitoring.metrics import observe_stage
+
+# Rows per multi-row INSERT when saving a syllabus. 1 = one INSERT per row
+# (the old behaviour, handy for comparing write speed).
+INSERT_BATCH_SIZE = int(os.environ.get("PARSE_INSERT_BATCH_SIZE", 500))
+
+MODULE_INSERT_SQL = "INSERT INTO Module (course_id, module_number, Module_name, Module_hours) VALUES (%s, %s, %s, %s)"
+MODULE_IDS_SQL = "SELECT module_id FROM Module WHERE course_id = %s ORDER BY module_id"
+TOPIC_INSERT_SQL = "INSERT INTO Topics (module_id, topic_name, importance, completion_status) VALUES (%s, %s, %s, %s)"
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+@contextlib.contextmanager
+def _reports_rollback():
+    # Entered once the connection is borrowed: an error past this point
+    # rolls back the transaction when the connection's block exits
+    try:
+        yield
+    except Exception:
+        print("Database changes were rolled back.")
+        raise
+
+def _insert_batched(cursor, sql, rows, batch_size):
+    # executemany() turns "INSERT ... VALUES" into one multi-row INSERT per call
+    for chunk in _chunks(rows, batch_size):
+        cursor.executemany(sql, chunk)
+
+def save_syllabus(syllabus, batch_size=None):
+    """
+    Inserts a parsed Syllabus (from extract_syllabus) as a new course.
+    Everything goes in one transaction. Returns the new course_id.
+
+    Modules and topics are written with multi-row INSERTs of up to
+    `batch_size` rows (default INSERT_BATCH_SIZE). Module ids are read
+    back with a single SELECT instead of one lastrowid per module.
+    """
+    batch_size = batch_size or INSERT_BATCH_SIZE
+    default_importance = 0
+    default_status = 0
+    modules = syllabus.modules
+
+    # Borrowed from the pool; any exception rolls the transaction back
+    with get_db_connection() as db, db.cursor() as cursor, _reports_rollback():
+        write_start = time.perf_counter()
+
+        # --- 4. DB Insert: Course (Matches your schema) ---
+        cursor.execute("INSERT INTO Course (course_code, COURSE_NAME) VALUES (%s, %s)",
+                       (syllabus.course_code, syllabus.course_name))
+        course_id = cursor.lastrowid
+        print(f"Inserted Course with ID: {course_id}")
+
+        if batch_size <= 1:
+            # --- Row-at-a-time path ---
+            module_ids = []
+            for module in modules:
+                cursor.execute(MODULE_INSERT_SQL, (course_id, module.number, module.name, module.hours))
+                module_ids.append(cursor.lastrowid)
+        else:
+            # --- DB Insert: Modules (batched) ---
+            _insert_batched(cursor, MODULE_INSERT_SQL,
+                            [(course_id, m.number, m.name, m.hours) for m in modules],
+                            batch_size)
+            # The course is brand new, so its modules are exactly the rows
+            # just inserted; auto-increment ids follow insertion order.
+            cursor.execute(MODULE_IDS_SQL, (course_id,))
+            module_ids = [row[0] for row in cursor.fetchall()]
+
+        # --- DB Insert: Topics (Matches your schema image) ---
+        topic_rows = [
+            (module_id, topic, default_importance, default_status)
+            for module_id, module in zip(module_ids, modules)
+            for topic in module.topics
+        ]
+        if batch_size <= 1:
+            for row in topic_rows:
+                cursor.execute(TOPIC_INSERT_SQL, row)
+        else:
+            _insert_batched(cursor, TOPIC_INSERT_SQL, topic_rows, batch_size)
+
+        # --- Completion rollups (every new topic starts at 0%) ---
+        rollups.add_course(cursor, course_id, topic_count=len(topic_rows))
+        rollups.add_modules(cursor, course_id,
+                            [(module_id, len(module.topics), 0) for module_id, module in zip(module_ids, modules)])
+        # New course: its dashboard and the home page list both change
+        versions.bump(cursor, course_id, course_list=True)
+
+        # --- 7. Finalize Transaction ---
+        db.commit()
+
+        elapsed = time.perf_counter() - write_start
+        observe_stage("insert", elapsed)
+        total_rows = 1 + len(modules) + len(topic_rows)
+        rate = total_rows / elapsed if elapsed > 0 else float("inf")
+        print(f"Wrote {total_rows} rows (batch size {batch_size}) in {elapsed:.3f}s: {rate:.0f} rows/sec")
+
+    print(f"\n--- SUCCESS! ---")
+    print(f"Syllabus data for {syllabus.course_code} saved to database.")
+    return course_id
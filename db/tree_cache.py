@@ -0,0 +1,130 @@
+"""
+In-process LRU cache of assembled dashboard trees (course, module_data),
+keyed by course_id.
+
+Entries are tagged with the course's content version (db/versions.py):
+a lookup only hits if the version it was stored under is still current,
+so a write committed by another worker process is never served stale.
+Writes in this process also drop the entry straight away (see
+db/mutations.py), which frees the memory without waiting for the TTL.
+
+Bounded by entry count, approximate size in bytes and a TTL. Configure
+with TREE_CACHE_ENABLED (0 turns it off), TREE_CACHE_SIZE,
+TREE_CACHE_MAX_BYTES and TREE_CACHE_TTL (seconds).
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+TREE_CACHE_CONFIG = {
+    "enabled": os.environ.get("TREE_CACHE_ENABLED", "1") != "0",
+    "max_entries": int(os.environ.get("TREE_CACHE_SIZE", 256)),
+    "max_bytes": int(os.environ.get("TREE_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    "ttl": float(os.environ.get("TREE_CACHE_TTL", 300)),
+}
+
+
+def _approx_size(tree):
+    # Serialised length is a cheap, stable stand-in for the memory used
+    return len(json.dumps(tree, default=str))
+
+
+class CourseTreeCache:
+    """Thread-safe LRU of course_id -> (version, course, module_data)."""
+
+    def __init__(self, enabled=True, max_entries=256, max_bytes=32 * 1024 * 1024, ttl=300.0):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # course_id -> (version, stored_at, size, (course, module_data))
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+        self._invalidations = 0
+
+    def get(self, course_id, version):
+        """Returns (course, module_data) if cached under `version` and still fresh, else None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(course_id)
+            if entry is not None:
+                cached_version, stored_at, _, tree = entry
+                if cached_version == version and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(course_id)
+                    self._hits += 1
+                    return tree
+                self._drop(course_id)
+                self._expired += 1
+            self._misses += 1
+            return None
+
+    def put(self, course_id, version, course, module_data):
+        if not self.enabled or self.max_entries <= 0:
+            return
+        tree = (course, module_data)
+        size = _approx_size(tree)
+        if size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        with self._lock:
+            if course_id in self._entries:
+                self._drop(course_id)
+            self._entries[course_id] = (version, time.monotonic(), size, tree)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._evictions += 1
+
+    def invalidate(self, course_id):
+        with self._lock:
+            if course_id in self._entries:
+                self._drop(course_id)
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _drop(self, course_id):
+        _, _, size, _ = self._entries.pop(course_id)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expired": self._expired,
+                "invalidations": self._invalidations,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tree_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CourseTreeCache(**TREE_CACHE_CONFIG)
+    return _cache
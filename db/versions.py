@@ -0,0 +1,37 @@
+"""
+Monotonic version counters used for conditional GETs (ETag / 304).
+
+    ContentVersion(course_id, version)
+
+One row per course, bumped by every write that changes what its
+dashboard shows, plus row 0 (COURSE_LIST) for the home page course list.
+Bumps happen in the writer's transaction, so a version never gets ahead
+of the data it describes. The table is created by `python -m db.migrations`.
+"""
+from db.backends import get_backend
+
+COURSE_LIST = 0
+
+VERSION_SQL = "SELECT version FROM ContentVersion WHERE course_id = %s"
+
+
+def bump(cursor, course_id=None, course_list=False):
+    """Bumps the version of `course_id` and, with course_list=True, of the home page list."""
+    sql = get_backend().increment_sql("ContentVersion", "course_id", "version")
+    if course_id is not None:
+        cursor.execute(sql, (course_id,))
+    if course_list:
+        cursor.execute(sql, (COURSE_LIST,))
+
+
+def forget(cursor, course_id):
+    """Drops a deleted course's counter."""
+    cursor.execute("DELETE FROM ContentVersion WHERE course_id = %s", (course_id,))
+
+
+def get_version(cursor, course_id=COURSE_LIST):
+    cursor.execute(VERSION_SQL, (course_id,))
+    row = cursor.fetchone()
+    if not row:
+        return 0
+    return row["version"] if isinstance(row, dict) else row[0]
@@ -0,0 +1,245 @@
+"""
+Optional write-behind buffer for topic completion / importance updates.
+
+Every slider change used to be its own UPDATE + commit. With
+TOPIC_WRITE_BEHIND=1 the update is parked here instead, keyed by
+topic_id (the last write wins), and a background thread writes the
+buffer in one transaction every TOPIC_FLUSH_INTERVAL_MS (default 250)
+or as soon as TOPIC_FLUSH_MAX_ENTRIES (default 100) topics are waiting.
+The write itself is mutations.update_topic_stats(), so rollups, version
+bumps and tree cache invalidation happen exactly as before, just later.
+
+Reads in this process see buffered values: the dashboard and home page
+overlay them on what they loaded, and mix them into their ETags.
+The buffer is per process, so with several workers another worker
+shows a change only after the flush (at most one interval later).
+The buffer is flushed on shutdown (see app.shutdown()) and at exit.
+"""
+import atexit
+import os
+import secrets
+import threading
+import time
+
+from db import mutations
+from monitoring.metrics import TOPIC_BUFFER_DEPTH, TOPIC_BUFFER_FLUSH_LATENCY, TOPIC_BUFFER_FLUSHED
+
+WRITE_BEHIND_CONFIG = {
+    "enabled": os.environ.get("TOPIC_WRITE_BEHIND", "0") == "1",
+    "flush_interval": int(os.environ.get("TOPIC_FLUSH_INTERVAL_MS", 250)) / 1000,
+    "max_entries": int(os.environ.get("TOPIC_FLUSH_MAX_ENTRIES", 100)),
+}
+
+
+class PendingStats:
+    __slots__ = ("course_id", "base_completion", "completion", "importance")
+
+    def __init__(self, course_id, base_completion, completion, importance):
+        self.course_id = course_id
+        self.base_completion = base_completion  # completion_status in the DB when first buffered
+        self.completion = completion
+        self.importance = importance
+
+
+class TopicStatsBuffer:
+    """Thread-safe topic_id -> PendingStats map with a background flusher."""
+
+    def __init__(self, enabled=False, flush_interval=0.25, max_entries=100):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self._pending = {}
+        self._flushing = {}  # taken by the running flush, still visible to reads until it commits
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        # Tags ETags of pages showing buffered values; unique to this process
+        self._token = secrets.token_hex(4)
+        self._generation = 0
+
+    def put(self, cursor, topic_id, completion, importance):
+        """
+        Buffers an update_topic_stats() call. Bad values and unknown topics
+        raise MutationError straight away; the first update of a topic costs
+        one SELECT (no lock, no commit) on `cursor`.
+        """
+        completion, importance = mutations.topic_stats(completion, importance)
+        with self._cond:
+            entry = self._pending.get(topic_id)
+            flushing = self._flushing.get(topic_id)
+        if entry is not None:
+            course_id, base_completion = entry.course_id, entry.base_completion
+        elif flushing is not None:
+            # The running flush is about to store flushing.completion
+            course_id, base_completion = flushing.course_id, flushing.completion
+        else:
+            _, course_id, base_completion = mutations.find_topic(cursor, topic_id)
+
+        with self._cond:
+            self._pending[topic_id] = PendingStats(course_id, base_completion, completion, importance)
+            self._generation += 1
+            depth = len(self._pending)
+            if self._thread is None:
+                self._start()
+            if depth >= self.max_entries:
+                self._cond.notify()
+        TOPIC_BUFFER_DEPTH.set(depth)
+        return {"topic_id": topic_id, "buffered": True}
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="topic-stats-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or len(self._pending) >= self.max_entries,
+                                    timeout=self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self):
+        """Writes everything buffered in one transaction. Returns the number of topics written."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._flushing = batch
+            if not batch:
+                return 0
+
+            from db.connection import get_db_connection
+
+            ops = [{"op": "update_topic_stats", "topic_id": topic_id,
+                    "completion": entry.completion, "importance": entry.importance}
+                   for topic_id, entry in batch.items()]
+            started = time.perf_counter()
+            written = 0
+            try:
+                with get_db_connection() as db, db.cursor() as cursor:
+                    results = []
+                    for i in range(0, len(ops), mutations.MAX_BATCH_OPS):
+                        results += mutations.apply_batch(cursor, ops[i:i + mutations.MAX_BATCH_OPS])
+                    db.commit()
+                written = sum(1 for result in results if result["ok"])
+                # Failed ops (e.g. the topic was deleted meanwhile) are not retried
+                TOPIC_BUFFER_FLUSHED.inc("written", amount=written)
+                TOPIC_BUFFER_FLUSHED.inc("dropped", amount=len(results) - written)
+            except Exception as e:
+                print(f"Error flushing {len(batch)} buffered topic stats: {e}")
+                # Retry with the next flush, unless a newer write replaced the entry.
+                # A newer entry took the failed one's completion as its base, but
+                # the database still holds the failed entry's base
+                with self._cond:
+                    for topic_id, entry in batch.items():
+                        newer = self._pending.setdefault(topic_id, entry)
+                        if newer is not entry:
+                            newer.base_completion = entry.base_completion
+                TOPIC_BUFFER_FLUSHED.inc("retried", amount=len(batch))
+            finally:
+                with self._cond:
+                    self._flushing = {}
+                    depth = len(self._pending)
+                TOPIC_BUFFER_FLUSH_LATENCY.observe(time.perf_counter() - started)
+                TOPIC_BUFFER_DEPTH.set(depth)
+            return written
+
+    def shutdown(self):
+        """Stops the flusher after a last flush. Safe to call more than once."""
+        with self._cond:
+            self._stopping = True
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.flush()
+
+    # --- Read-your-writes ---
+
+    def _snapshot(self):
+        with self._cond:
+            return {**self._flushing, **self._pending}
+
+    def etag_tag(self, course_id=None):
+        """
+        Suffix for a page's version while it shows buffered values: empty
+        when nothing is buffered for `course_id` (None: for any course).
+        """
+        pending = self._snapshot()
+        if not any(course_id is None or entry.course_id == course_id for entry in pending.values()):
+            return ""
+        return f"-b{self._token}.{self._generation}"
+
+    def pending_topics(self, course_id):
+        """Ids of the course's topics with buffered values."""
+        return {topic_id for topic_id, entry in self._snapshot().items() if entry.course_id == course_id}
+
+    def overlay_tree(self, course_id, module_data):
+        """module_data with buffered values applied. The input (maybe cached) is not modified."""
+        pending = {topic_id: entry for topic_id, entry in self._snapshot().items()
+                   if entry.course_id == course_id}
+        if not pending:
+            return module_data
+        overlaid = []
+        for block in module_data:
+            if any(topic["topic_id"] in pending for topic in block["topics"]):
+                topics = []
+                for topic in block["topics"]:
+                    entry = pending.get(topic["topic_id"])
+                    if entry is not None:
+                        topic = {**topic, "completion_status": entry.completion, "importance": entry.importance}
+                    topics.append(topic)
+                block = {**block, "topics": topics}
+            overlaid.append(block)
+        return overlaid
+
+    def overlay_courses(self, courses):
+        """
+        Adjusts completion_percentage of home page rows (which carry
+        topic_count) by the buffered completion changes.
+        """
+        deltas = {}
+        for entry in self._snapshot().values():
+            deltas[entry.course_id] = deltas.get(entry.course_id, 0) + entry.completion - entry.base_completion
+        if not any(deltas.values()):
+            return courses
+        overlaid = []
+        for course in courses:
+            delta = deltas.get(course["course_id"])
+            if delta and course["topic_count"]:
+                course = {**course, "completion_percentage":
+                          float(course["completion_percentage"]) + delta / course["topic_count"]}
+            overlaid.append(course)
+        return overlaid
+
+    def stats(self):
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "pending": len(self._pending),
+                "flushing": len(self._flushing),
+                "flush_interval_ms": int(self.flush_interval * 1000),
+                "max_entries": self.max_entries,
+            }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_topic_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = TopicStatsBuffer(**WRITE_BEHIND_CONFIG)
+    return _buffer
+
+
+def shutdown_topic_buffer():
+    """Flushes and stops this process's buffer, if it has one."""
+    if _buffer is not None:
+        _buffer.shutdown()
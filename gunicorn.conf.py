@@ -0,0 +1,45 @@
+"""
+gunicorn settings for wsgi:app (override with environment variables):
+
+    WEB_BIND              address to listen on (default 0.0.0.0:8000)
+    WEB_WORKERS           worker processes (default: CPU count)
+    WEB_THREADS           request threads per worker (default 4)
+    WEB_TIMEOUT           seconds before a stuck worker is restarted (default 60)
+    WEB_GRACEFUL_TIMEOUT  seconds a stopping worker gets to finish requests (default 30)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Parsing is mostly CPU bound, so add workers rather than threads for
+throughput; threads cover requests waiting on the database. Each worker
+has its own DB pool, parse queue and caches: plan for
+WEB_WORKERS * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW) database connections.
+"""
+import os
+
+bind = os.environ.get("WEB_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_WORKERS", os.cpu_count() or 1))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.environ.get("WEB_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+
+# One pooled connection per request thread unless configured otherwise.
+# Set before the app is imported, since db/connection.py reads it then.
+os.environ.setdefault("DB_POOL_SIZE", str(threads))
+
+# Import the app once in the master: workers share BUILD_ID (and so their
+# ETags) and, if SECRET_KEY is unset, the same random session key.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # create_app() opens no connections, but drop anything the master did
+    # open so the worker never shares a socket with it.
+    from db.connection import reset_pool_after_fork
+    reset_pool_after_fork()
+
+
+def worker_exit(server, worker):
+    # Runs after in-flight requests have finished (SIGTERM / SIGHUP / max requests)
+    from app import shutdown
+    shutdown()
@@ -0,0 +1,243 @@
+"""
+Background queue for syllabus parsing.
+
+/upload used to run parse_syllabus_pdf() inside the request thread, which
+ties up a web worker for the whole pdfplumber pass. Uploads are now handed
+to a bounded worker pool and the client polls /jobs/<id> for the result.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from parsers.syllabus_parser import extract_syllabus, parse_syllabus_pdf
+from parsers.upload_cache import get_parse_cache
+from monitoring.metrics import capture_stages, replay_stages
+
+# --- Settings (override with environment variables) ---
+QUEUE_CONFIG = {
+    "workers": int(os.environ.get("PARSE_WORKERS", 2)),
+    "executor": os.environ.get("PARSE_EXECUTOR", "thread"),  # "thread" or "process"
+    "max_pending": int(os.environ.get("PARSE_QUEUE_SIZE", 20)),
+    "history": int(os.environ.get("PARSE_JOB_HISTORY", 500)),
+}
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when too many parse jobs are already waiting."""
+
+
+def _init_process_worker():
+    # A forked worker inherits the parent's pool object (and its sockets).
+    # Drop it without closing so the child opens its own connections.
+    from db.connection import reset_pool_after_fork
+    reset_pool_after_fork()
+
+
+def _run_parse(path, syllabus=None):
+    """
+    Runs in the worker. With a cached `syllabus` the PDF is not read at all.
+    Returns (course_id, freshly parsed syllabus or None, finished_at, parser
+    stage timings). The timings are recorded by the parent, so they
+    reach /metrics with the process executor too.
+    """
+    parsed = None
+    with capture_stages() as stages:
+        if syllabus is None:
+            syllabus = parsed = extract_syllabus(path)
+        course_id = parse_syllabus_pdf(path, syllabus) if syllabus else None
+    return course_id, parsed, time.time(), stages
+
+
+class ParseJob:
+    def __init__(self, job_id, filename, path, content_hash=None):
+        self.id = job_id
+        self.filename = filename
+        self.path = path
+        self.content_hash = content_hash
+        self.cache_hit = False
+        self.status = QUEUED
+        self.course_id = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "course_id": self.course_id,
+            "error": self.error,
+            "cache_hit": self.cache_hit,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_seconds": _elapsed(self.submitted_at, self.started_at),
+            "run_seconds": _elapsed(self.started_at, self.finished_at),
+        }
+
+
+def _elapsed(start, end):
+    if start is None or end is None:
+        return None
+    return round(end - start, 3)
+
+
+class ParseQueue:
+    """
+    Bounded parse job queue.
+
+    At most `max_pending` jobs may be queued or running at once; submit()
+    raises QueueFullError beyond that so the route can answer 429.
+    Finished jobs are kept (up to `history`) so clients can still poll them.
+    """
+
+    def __init__(self, workers=2, executor="thread", max_pending=20, history=500):
+        # Jobs always start on one of `workers` threads, which mark them
+        # running; with the process executor each thread hands its job to
+        # one of as many processes and waits for it
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+        self._processes = None
+        if executor == "process":
+            self._processes = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker)
+        self.kind = executor
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history = history
+
+        self._jobs = {}  # job_id -> ParseJob, insertion ordered
+        self._pending = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def submit(self, path, filename=None, content_hash=None):
+        """
+        Queues a parse. With a `content_hash`, a previously parsed copy of
+        the same file is looked up in the parse cache (in this process, so
+        it works for both executors) and the worker only does the inserts.
+        """
+        job = ParseJob(uuid.uuid4().hex, filename or os.path.basename(path), path, content_hash)
+        with self._lock:
+            self._check_capacity()
+            self._pending += 1
+            self._jobs[job.id] = job
+            self._trim_history()
+
+        cached = get_parse_cache().get(content_hash) if content_hash else None
+        job.cache_hit = cached is not None
+
+        try:
+            job.future = self._executor.submit(self._run, job, cached)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(job.id, None)
+            raise
+        job.future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return job
+
+    def check_capacity(self):
+        """Raises QueueFullError if submit() would, e.g. before storing an upload."""
+        with self._lock:
+            self._check_capacity()
+
+    def _check_capacity(self):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise QueueFullError(f"{self._pending} syllabi are already being processed. Please try again shortly.")
+
+    def _run(self, job, cached):
+        job.started_at = time.time()
+        job.status = RUNNING
+        if self._processes is not None:
+            return self._processes.submit(_run_parse, job.path, cached).result()
+        return _run_parse(job.path, cached)
+
+    def _finish(self, job, future):
+        try:
+            course_id, parsed, finished, stages = future.result()
+            replay_stages(stages)
+            job.finished_at = finished
+            job.course_id = course_id
+            if course_id:
+                job.status = DONE
+                if parsed is not None and job.content_hash:
+                    get_parse_cache().put(job.content_hash, parsed)
+            else:
+                job.status = FAILED
+                job.error = "Failed to parse the PDF. Please check the file and try again."
+        except Exception as e:
+            print(f"CRITICAL PARSER ERROR (job {job.id}): {e}")
+            job.finished_at = time.time()
+            job.status = FAILED
+            job.error = f"A critical error occurred during parsing: {e}"
+        finally:
+            job.future = None
+            with self._lock:
+                self._pending -= 1
+
+    def _trim_history(self):
+        # Drop the oldest finished jobs once we keep more than `history`
+        if len(self._jobs) <= self.history:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.history:
+                break
+            if self._jobs[job_id].status in (DONE, FAILED):
+                del self._jobs[job_id]
+
+    def is_pending(self, path):
+        """True if a queued or running job reads the file at `path`."""
+        with self._lock:
+            return any(job.path == path and job.status in (QUEUED, RUNNING) for job in self._jobs.values())
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "rejected": self._rejected,
+                "tracked_jobs": len(self._jobs),
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_parse_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = ParseQueue(**QUEUE_CONFIG)
+    return _queue
+
+
+def shutdown_parse_queue(wait=True):
+    """
+    Stops this process's queue, if it started one. With `wait`, queued and
+    running jobs finish first, so a graceful worker exit loses no uploads.
+    """
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.shutdown(wait=wait)
@@ -0,0 +1,267 @@
+"""
+Minimal in-process metrics, exposed at /metrics in the Prometheus text
+format (no prometheus_client dependency).
+
+    http_request_duration_seconds   histogram  {method, route}
+    http_requests_total             counter    {method, route, status}
+    http_request_db_queries         histogram  {route}  queries per request
+    http_request_db_seconds         histogram  {route}  DB time per request
+    db_query_duration_seconds       histogram  {route}  ("background" outside requests)
+    parser_stage_duration_seconds   histogram  {stage}  open / extract_page / merge / split / insert
+    topic_stats_buffer_depth        gauge               write-behind updates not yet written
+    topic_stats_flush_duration_seconds histogram        one write-behind flush
+    topic_stats_flushed_total       counter    {result} written / dropped / retried
+
+Recording is a perf_counter() pair, a bisect and a locked increment, so
+it is cheap enough to leave on for every request and query. Values are
+per process: with several workers, scrape each one (or aggregate).
+"""
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        names = self.labels + ("le",)
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(names, label_values + (le,))} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route.", ("method", "route"))
+REQUESTS = Counter("http_requests_total", "Requests by route and status code.", ("method", "route", "status"))
+REQUEST_DB_QUERIES = Histogram("http_request_db_queries", "DB queries issued per request.", ("route",),
+                               buckets=QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Total DB query time per request.", ("route",))
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "Latency of single DB statements.", ("route",))
+PARSER_STAGE_LATENCY = Histogram("parser_stage_duration_seconds", "Syllabus parser stage durations.", ("stage",))
+TOPIC_BUFFER_DEPTH = Gauge("topic_stats_buffer_depth", "Topic stat updates waiting to be written.")
+TOPIC_BUFFER_FLUSH_LATENCY = Histogram("topic_stats_flush_duration_seconds", "Time to write one batch of buffered topic stats.")
+TOPIC_BUFFER_FLUSHED = Counter("topic_stats_flushed_total", "Buffered topic stat updates by outcome.", ("result",))
+
+METRICS = (REQUEST_LATENCY, REQUESTS, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS, DB_QUERY_LATENCY, PARSER_STAGE_LATENCY,
+           TOPIC_BUFFER_DEPTH, TOPIC_BUFFER_FLUSH_LATENCY, TOPIC_BUFFER_FLUSHED)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Per-request bookkeeping (one request per thread at a time) ---
+
+_local = threading.local()
+
+
+def start_request():
+    _local.started = time.perf_counter()
+    _local.queries = 0
+    _local.query_seconds = 0.0
+    _local.route = "unmatched"
+    _local.status = None
+
+
+def set_route(route):
+    _local.route = route
+
+
+def set_status(status):
+    _local.status = status
+
+
+def finish_request(method):
+    """Records the request. Without a set_status() (the view raised), it counts as a 500."""
+    started = getattr(_local, "started", None)
+    if started is None:
+        return
+    route = _local.route
+    status = _local.status or 500
+    REQUEST_LATENCY.observe(time.perf_counter() - started, method, route)
+    REQUESTS.inc(method, route, status)
+    REQUEST_DB_QUERIES.observe(_local.queries, route)
+    REQUEST_DB_SECONDS.observe(_local.query_seconds, route)
+    _local.started = None
+
+
+def current_request_stats():
+    """(queries, seconds) so far in this thread's request, or None outside a request."""
+    if getattr(_local, "started", None) is None:
+        return None
+    return _local.queries, _local.query_seconds
+
+
+def record_query(seconds):
+    if getattr(_local, "started", None) is None:
+        DB_QUERY_LATENCY.observe(seconds, "background")
+        return
+    _local.queries += 1
+    _local.query_seconds += seconds
+    DB_QUERY_LATENCY.observe(seconds, _local.route)
+
+
+class InstrumentedCursor:
+    """Wraps a DB cursor and times execute()/executemany(); everything else is passed through."""
+
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            record_query(time.perf_counter() - start)
+
+    def executemany(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(*args, **kwargs)
+        finally:
+            record_query(time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+        return False
+
+
+# --- Parser stages ---
+
+def observe_stage(stage, seconds):
+    """
+    Records a parser stage duration. Inside capture_stages() the value is
+    collected instead, so a worker process can send it back to the parent.
+    """
+    captured = getattr(_local, "captured_stages", None)
+    if captured is not None:
+        captured.append((stage, seconds))
+    else:
+        PARSER_STAGE_LATENCY.observe(seconds, stage)
+
+
+class capture_stages:
+    """
+    Collects observe_stage() calls made in this thread into a list:
+
+        with capture_stages() as stages:
+            ...
+        replay_stages(stages)   # e.g. in the parent process
+    """
+
+    def __enter__(self):
+        self._previous = getattr(_local, "captured_stages", None)
+        _local.captured_stages = []
+        return _local.captured_stages
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.captured_stages = self._previous
+        return False
+
+
+def replay_stages(stages):
+    for stage, seconds in stages:
+        observe_stage(stage, seconds)
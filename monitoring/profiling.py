@@ -0,0 +1,83 @@
+"""
+Opt-in profiling of single requests.
+
+Only installed when PROFILE_TOKEN is set (see app.py); otherwise nothing
+is wrapped and requests pay nothing. With it set, a request carrying the
+token, either as
+
+    GET /dashboard/3?_profile=<token>
+    X-Profile-Token: <token>
+
+runs under cProfile. The stats are written to PROFILE_DIR (default
+"profiles") as a .prof file, which pstats, snakeviz or flameprof can
+read. The file name is returned in the X-Profile-File response header.
+"""
+import cProfile
+import hmac
+import os
+import re
+import time
+from urllib.parse import parse_qs
+
+PROFILE_CONFIG = {
+    "token": os.environ.get("PROFILE_TOKEN", ""),
+    "directory": os.environ.get("PROFILE_DIR", "profiles"),
+}
+
+QUERY_PARAM = "_profile"
+HEADER = "HTTP_X_PROFILE_TOKEN"
+
+
+class ProfilingMiddleware:
+    """WSGI middleware that profiles requests presenting the admin token."""
+
+    def __init__(self, app, token, directory="profiles"):
+        if not token:
+            raise ValueError("A profiling token is required.")
+        self.app = app
+        self.token = token
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _requested(self, environ):
+        supplied = environ.get(HEADER)
+        if supplied is None and QUERY_PARAM in environ.get("QUERY_STRING", ""):
+            supplied = parse_qs(environ["QUERY_STRING"]).get(QUERY_PARAM, [None])[0]
+        return supplied is not None and hmac.compare_digest(supplied.encode(), self.token.encode())
+
+    def __call__(self, environ, start_response):
+        if not self._requested(environ):
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured["status"], captured["headers"], captured["exc_info"] = status, headers, exc_info
+            return lambda data: captured.setdefault("written", []).append(data)
+
+        def run():
+            # Drain the body inside the profiler so lazy responses are included
+            app_iter = self.app(environ, capture_start_response)
+            try:
+                return list(app_iter)
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        body = profiler.runcall(run)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        path = self._write(profiler, environ, elapsed_ms)
+        headers = list(captured["headers"]) + [("X-Profile-File", os.path.basename(path))]
+        start_response(captured["status"], headers, captured["exc_info"])
+        return captured.get("written", []) + body
+
+    def _write(self, profiler, environ, elapsed_ms):
+        route = re.sub(r"[^A-Za-z0-9]+", "_", environ.get("PATH_INFO", "")).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{environ.get('REQUEST_METHOD', 'GET')}-{route}-{elapsed_ms:.0f}ms-{os.urandom(2).hex()}.prof"
+        path = os.path.join(self.directory, name)
+        profiler.dump_stats(path)
+        print(f"Profiled {environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')} in {elapsed_ms:.0f}ms -> {path}")
+        return path
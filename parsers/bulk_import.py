@@ -0,0 +1,130 @@
+"""
+Imports a whole directory of syllabus PDFs.
+
+Parsing (the slow, CPU-bound pdfplumber part) fans out over a process
+pool; every parsed Syllabus is written by this process, one course at a
+time, through db.syllabus_writer.
+
+    python -m parsers.bulk_import path/to/syllabi --workers 8
+    python -m parsers.bulk_import path/to/syllabi --dry-run   # parse only
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from parsers.syllabus_parser import extract_syllabus
+
+
+def find_pdfs(directory, recursive=False):
+    if recursive:
+        paths = [os.path.join(root, name)
+                 for root, _, files in os.walk(directory)
+                 for name in files if name.lower().endswith(".pdf")]
+    else:
+        paths = [os.path.join(directory, name)
+                 for name in os.listdir(directory) if name.lower().endswith(".pdf")]
+    return sorted(paths)
+
+
+def _parse_one(path):
+    """
+    Worker side. Returns (path, syllabus, error). The parser's own
+    progress prints are swallowed so the importer's report stays readable.
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            syllabus = extract_syllabus(path)
+        if syllabus is None:
+            return path, None, "No table data found in the document."
+        if not syllabus.modules:
+            return path, None, "No 'Module:' rows found."
+        return path, syllabus, None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def _write_one(syllabus, batch_size):
+    from db.syllabus_writer import save_syllabus
+    with contextlib.redirect_stdout(io.StringIO()):
+        return save_syllabus(syllabus, batch_size=batch_size)
+
+
+def run_import(paths, workers=None, dry_run=False, batch_size=None, out=sys.stdout):
+    """
+    Parses `paths` in parallel and saves each result as it arrives.
+    Returns (imported, errors) where errors is a list of (path, message).
+    """
+    total = len(paths)
+    imported = []
+    errors = []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_parse_one, path) for path in paths]
+        for done, future in enumerate(as_completed(futures), start=1):
+            path, syllabus, error = future.result()
+            name = os.path.basename(path)
+
+            if error is None and not dry_run:
+                try:
+                    course_id = _write_one(syllabus, batch_size)
+                except Exception as e:
+                    error = f"DB write failed: {type(e).__name__}: {e}"
+                    traceback.print_exc(file=sys.stderr)
+
+            if error is not None:
+                errors.append((path, error))
+                print(f"[{done}/{total}] FAIL {name}: {error}", file=out)
+                continue
+
+            imported.append(path)
+            summary = f"{syllabus.course_code} ({len(syllabus.modules)} modules, {syllabus.topic_count} topics)"
+            if dry_run:
+                print(f"[{done}/{total}] ok   {name}: {summary}", file=out)
+            else:
+                print(f"[{done}/{total}] ok   {name}: {summary} -> course {course_id}", file=out)
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"\nProcessed {total} file(s) in {elapsed:.1f}s ({rate:.1f} files/sec): "
+          f"{len(imported)} imported, {len(errors)} failed.", file=out)
+
+    if errors:
+        print("\n--- Errors ---", file=out)
+        for path, error in errors:
+            print(f"{path}: {error}", file=out)
+
+    return imported, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import a directory of syllabus PDFs.")
+    parser.add_argument("directory", help="Folder containing syllabus PDFs")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Parser processes (default: number of CPUs)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also look in sub-folders")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Rows per multi-row INSERT (default: PARSE_INSERT_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="Parse only, don't write to the database")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"'{args.directory}' is not a directory")
+
+    paths = find_pdfs(args.directory, args.recursive)
+    if not paths:
+        print(f"No PDF files found in '{args.directory}'.")
+        return 0
+
+    print(f"Importing {len(paths)} syllabi with {args.workers or os.cpu_count()} worker(s)...")
+    _, errors = run_import(paths, workers=args.workers, dry_run=args.dry_run, batch_size=args.batch_size)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""
+Registry of known syllabus page layouts, so repeat formats skip the slow
+part of table extraction.
+
+Nearly every upload is one of a few VIT layouts. Table detection
+(find_tables) is cheap; Table.extract() is not: it scans every char of
+the page once per row. A page's layout is fingerprinted from its page
+size and the column x-positions of the table pdfplumber found (row
+positions vary with the content). The first time a fingerprint is seen
+the page goes through Table.extract() and its columns are recorded. The
+fast path is also run on that page and the template is marked verified
+only if both give the same rows.
+
+Later pages with a known, verified fingerprint take the fast path: only
+the chars inside the table are read, bucketed by row. Pages of a layout
+whose template is not verified keep using Table.extract().
+
+Templates and hit / fallback / miss counts are kept in a JSON file
+(LAYOUT_TEMPLATE_FILE, default layout_templates.json next to app.py; the
+app sets it from its LAYOUT_TEMPLATES config). After each document a
+process merges what it learned into the file under an exclusive lock
+(<file>.lock), so workers sharing it don't lose each other's updates.
+LAYOUT_TEMPLATES=0 turns the registry off.
+
+    python -m parsers.layout_templates            # hit rate and templates
+    python -m parsers.layout_templates clear
+"""
+import argparse
+import bisect
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from pdfplumber import utils
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from several processes are not serialised
+    fcntl = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAYOUT_CONFIG = {
+    "enabled": os.environ.get("LAYOUT_TEMPLATES", "1") == "1",
+    "path": os.environ.get("LAYOUT_TEMPLATE_FILE", os.path.join(ROOT, "layout_templates.json")),
+    "max_templates": int(os.environ.get("LAYOUT_TEMPLATE_MAX", 64)),
+}
+
+# 2: keyed by the table's columns instead of every ruling on the page
+FORMAT_VERSION = 2
+
+
+def _columns(table):
+    return sorted({round(x, 1) for cell in table.cells for x in (cell[0], cell[2])})
+
+
+def fingerprint(page, table):
+    """Layout key of a page: its size and the column x-positions of `table`, found on it."""
+    columns = ",".join(str(round(x)) for x in _columns(table))
+    key = f"{round(page.width)}x{round(page.height)}:{columns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _in_bbox(char, x0, top, x1, bottom):
+    # Same test as pdfplumber's Table.extract(): the char's midpoint
+    h_mid = (char["x0"] + char["x1"]) / 2
+    v_mid = (char["top"] + char["bottom"]) / 2
+    return x0 <= h_mid < x1 and top <= v_mid < bottom
+
+
+def extract_rows(table, chars):
+    """
+    Table.extract() for the chars inside the table: they are sorted by
+    vertical midpoint once, and each row takes its slice by bisection.
+    Chars keep page order within a cell, so the text is identical.
+    """
+    x0, top, x1, bottom = table.bbox
+    chars = [char for char in chars if _in_bbox(char, x0, top, x1, bottom)]
+    mids = sorted(((char["top"] + char["bottom"]) / 2, i) for i, char in enumerate(chars))
+    keys = [mid for mid, _ in mids]
+
+    rows = []
+    for row in table.rows:
+        rx0, rtop, rx1, rbottom = row.bbox
+        lo, hi = bisect.bisect_left(keys, rtop), bisect.bisect_left(keys, rbottom)
+        row_chars = [chars[i] for i in sorted(i for _, i in mids[lo:hi])]
+        row_chars = [char for char in row_chars if rx0 <= (char["x0"] + char["x1"]) / 2 < rx1]
+        cells = []
+        for cell in row.cells:
+            if cell is None:
+                cells.append(None)
+                continue
+            cell_chars = [char for char in row_chars if _in_bbox(char, *cell)]
+            cells.append(utils.extract_text(cell_chars) if cell_chars else "")
+        rows.append(cells)
+    return rows
+
+
+class LayoutRegistry:
+    """Thread-safe fingerprint -> template map, persisted to `path` (None: memory only)."""
+
+    def __init__(self, path=None, max_templates=64):
+        self.path = path
+        self.max_templates = max_templates
+        self._lock = threading.Lock()
+        # Since the last save
+        self._new = {}
+        self._counts = {}  # fingerprint -> [hits, fallbacks]
+        self._new_misses = 0
+        data = self._read()
+        self._templates, self._misses = data["templates"], data["misses"]
+
+    # --- Persistence ---
+
+    def _read(self):
+        empty = {"templates": {}, "misses": 0}
+        if not self.path:
+            return empty
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return empty
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable layout templates in {self.path}: {e}")
+            return empty
+        if data.get("format") != FORMAT_VERSION:
+            return empty
+        return {"templates": data.get("templates", {}), "misses": data.get("misses", 0)}
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        # Held across read-merge-write; closing the lock file releases it
+        with open(f"{self.path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def save(self):
+        """Merges this process's new templates and counts into the file. Cheap when nothing changed."""
+        with self._lock:
+            if not (self._new or self._counts or self._new_misses):
+                return
+            if self.path:
+                try:
+                    with self._file_lock():
+                        templates, misses = self._merge(self._read())
+                        tmp = f"{self.path}.{os.getpid()}.tmp"
+                        with open(tmp, "w", encoding="utf-8") as f:
+                            json.dump({"format": FORMAT_VERSION, "misses": misses, "templates": templates}, f, indent=1)
+                        os.replace(tmp, self.path)
+                except OSError as e:
+                    print(f"Could not save layout templates to {self.path}: {e}; keeping them in memory.")
+                    self.path = None
+            if not self.path:
+                templates, misses = self._merge({"templates": self._templates, "misses": self._misses})
+            self._templates, self._misses = templates, misses
+            self._new, self._counts, self._new_misses = {}, {}, 0
+
+    def _merge(self, data):
+        """`data` (as from _read()) plus this process's unsaved templates and counts."""
+        templates = data["templates"]
+        for fp, template in self._new.items():
+            templates.setdefault(fp, template)
+        for fp, (hits, fallbacks) in self._counts.items():
+            template = templates.get(fp) or self._templates.get(fp)
+            if template is not None:
+                # A copy: self._templates is left as it was if the write fails
+                templates[fp] = dict(template, hits=template["hits"] + hits,
+                                     fallbacks=template["fallbacks"] + fallbacks, last_used=time.time())
+        if len(templates) > self.max_templates:
+            keep = sorted(templates, key=lambda fp: templates[fp]["last_used"])[-self.max_templates:]
+            templates = {fp: templates[fp] for fp in keep}
+        return templates, data["misses"] + self._new_misses
+
+    def clear(self):
+        with self._lock:
+            self._templates, self._misses = {}, 0
+            self._new, self._counts, self._new_misses = {}, {}, 0
+            if self.path and os.path.exists(self.path):
+                with self._file_lock():
+                    os.remove(self.path)
+
+    # --- Extraction ---
+
+    def first_table(self, page):
+        """
+        Rows of the first table on the page (as page.extract_tables()[0]),
+        or None if it has none.
+        """
+        tables = page.find_tables()
+        if not tables:
+            return None
+        table = tables[0]
+        fp = fingerprint(page, table)
+
+        with self._lock:
+            template = self._templates.get(fp) or self._new.get(fp)
+        if template is None:
+            rows = table.extract()
+            self._learn(fp, page, table, verified=extract_rows(table, page.chars) == rows)
+            return rows
+        if template["verified"]:
+            self._count(fp, hit=True)
+            return extract_rows(table, page.chars)
+        self._count(fp, hit=False)
+        return table.extract()
+
+    def _learn(self, fp, page, table, verified):
+        now = time.time()
+        template = {
+            "page_size": [round(page.width, 1), round(page.height, 1)],
+            "columns": _columns(table),
+            "verified": verified,
+            "hits": 0,
+            "fallbacks": 0,
+            "created": now,
+            "last_used": now,
+        }
+        with self._lock:
+            self._new.setdefault(fp, template)
+            self._new_misses += 1
+
+    def _count(self, fp, hit):
+        with self._lock:
+            counts = self._counts.setdefault(fp, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def stats(self):
+        """
+        Totals as of this process's last save (which merged in every other
+        process's) plus its unsaved counts. Served from memory.
+        """
+        with self._lock:
+            saved = self._templates
+            templates = {**saved, **{fp: t for fp, t in self._new.items() if fp not in saved}}
+            hits = sum(t["hits"] for t in saved.values()) + sum(c[0] for c in self._counts.values())
+            fallbacks = sum(t["fallbacks"] for t in saved.values()) + sum(c[1] for c in self._counts.values())
+            misses = self._misses + self._new_misses
+        lookups = hits + fallbacks + misses
+        return {
+            "path": self.path,
+            "templates": len(templates),
+            "verified": sum(1 for t in templates.values() if t["verified"]),
+            "max_templates": self.max_templates,
+            "hits": hits,
+            "fallbacks": fallbacks,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def templates(self):
+        with self._lock:
+            return {**self._templates, **self._new}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_layout_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LayoutRegistry(LAYOUT_CONFIG["path"], LAYOUT_CONFIG["max_templates"])
+    return _registry
+
+
+def configure_layouts(settings=None):
+    """
+    Applies LAYOUT_CONFIG keys (enabled, path, max_templates), e.g. from
+    create_app(). The current registry is saved and dropped; the next
+    get_layout_registry() opens one with the new settings.
+    """
+    global _registry
+    LAYOUT_CONFIG.update(settings or {})
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m parsers.layout_templates", description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", nargs="?", choices=("show", "clear"), default="show")
+    args = parser.parse_args(argv)
+
+    registry = get_layout_registry()
+    if args.command == "clear":
+        registry.clear()
+        print(f"Removed {registry.path}")
+        return 0
+
+    stats = registry.stats()
+    print(f"{stats['templates']} template(s) in {stats['path']}; hit rate {stats['hit_rate']:.1%} "
+          f"({stats['hits']} hits, {stats['fallbacks']} fallbacks, {stats['misses']} misses)")
+    for fp, t in sorted(registry.templates().items(), key=lambda item: -item[1]["hits"]):
+        width, height = t["page_size"]
+        print(f"  {fp}  {width:g}x{height:g}  columns={t['columns']}  hits={t['hits']}  "
+              f"fallbacks={t['fallbacks']}{'' if t['verified'] else '  (not verified: full path only)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
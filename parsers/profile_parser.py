@@ -0,0 +1,67 @@
+"""
+Profiles the parser on one PDF, without touching the database.
+
+Runs extract_syllabus(), which is everything parse_syllabus_pdf() does
+apart from the final save_syllabus(), under cProfile. It prints the top
+functions and can save the stats for pstats / snakeviz / flameprof.
+
+    python -m parsers.profile_parser syllabus.pdf
+    python -m parsers.profile_parser syllabus.pdf --repeat 5 --sort tottime --output parse.prof
+"""
+import argparse
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+
+from parsers.syllabus_parser import extract_syllabus
+
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+
+def profile_parse(path, repeat=1):
+    """Returns (profiler, last Syllabus or None, list of wall times in seconds)."""
+    profiler = cProfile.Profile()
+    timings, syllabus = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            syllabus = profiler.runcall(extract_syllabus, path)
+            timings.append(time.perf_counter() - start)
+    return profiler, syllabus, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the syllabus parser on a PDF (no DB writes).")
+    parser.add_argument("pdf", help="Syllabus PDF to parse")
+    parser.add_argument("--repeat", type=int, default=1, help="Parse the file this many times (default 1)")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="cumulative", help="Sort order of the report")
+    parser.add_argument("--limit", type=int, default=25, help="Functions to show (default 25)")
+    parser.add_argument("--output", help="Also save the raw stats to this .prof file")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.pdf):
+        parser.error(f"'{args.pdf}' is not a file")
+
+    profiler, syllabus, timings = profile_parse(args.pdf, args.repeat)
+
+    if syllabus is None:
+        print("Parsed: no table data found.")
+    else:
+        print(f"Parsed: {syllabus.course_code} {syllabus.course_name}: "
+              f"{len(syllabus.modules)} modules, {syllabus.topic_count} topics")
+    print(f"Wall time: {min(timings) * 1000:.1f}ms best of {len(timings)}\n")
+
+    pstats.Stats(profiler).strip_dirs().sort_stats(args.sort).print_stats(args.limit)
+
+    if args.output:
+        profiler.dump_stats(args.output)
+        print(f"Saved stats to {args.output}")
+    return 0 if syllabus is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Plain data returned by the parsing stage (no DB, no pdfplumber objects).
+
+Kept small on purpose: instances are pickled between processes by the
+bulk importer and held in the upload cache.
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class ParsedModule:
+    __slots__ = ("number", "name", "hours", "topics")
+
+    number: int
+    name: str
+    hours: int
+    topics: list
+
+
+@dataclass
+class Syllabus:
+    __slots__ = ("course_code", "course_name", "modules")
+
+    course_code: str
+    course_name: str
+    modules: list
+
+    @property
+    def topic_count(self):
+        return sum(len(m.topics) for m in self.modules)
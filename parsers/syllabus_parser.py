@@ -2,178 +2,248 @@ import pdfplumber
 import sys
 import re
 import os
-from db.connection import get_db_connection  # Your database connection
+import time
+from parsers.syllabus import Syllabus, ParsedModule
+from db.syllabus_writer import save_syllabus  # The DB side lives in db/
+from monitoring.metrics import observe_stage
+from parsers.layout_templates import LAYOUT_CONFIG, get_layout_registry
 
-def get_full_table(doc):
+# Rows that mark the end of the module section in VIT syllabi.
+# Once one of these is seen no further pages are read.
+MODULE_SECTION_END = re.compile(
+    r'^\s*(Total\s+Lecture|Text\s*Book|Reference\s*Book|Mode\s+of\s+(Evaluation|Assessment)'
+    r'|List\s+of\s+(Experiments|Challenging)|Recommended\s+by|Approved\s+by)',
+    re.IGNORECASE,
+)
+
+def iter_table_rows(doc, page_seconds=None, layouts=None):
+    """
+    Lazily yields the rows of the first table on each page.
+    Pages are only extracted when the caller asks for more rows, so a
+    consumer that stops early never touches the remaining pages.
+
+    Pages of a known layout take the fast path of `layouts`, a
+    LayoutRegistry (default: this process's, see parsers/layout_templates.py;
+    False: always plain extract_tables()). It is saved when the rows are
+    exhausted or closed.
+
+    Each page's extraction time is recorded as the "extract_page" stage
+    and, if given, appended to the `page_seconds` list.
+    """
+    if layouts is None:
+        layouts = get_layout_registry() if LAYOUT_CONFIG["enabled"] else False
+    print(f"--- Processing up to {len(doc.pages)} pages ---")
+
+    try:
+        for i, page in enumerate(doc.pages):
+            start = time.perf_counter()
+            if layouts:
+                # Only the first table is used, so only it is extracted
+                table_part = layouts.first_table(page)
+                tables = [table_part] if table_part is not None else []
+            else:
+                # extract_tables() is safer as it always returns a list
+                tables = page.extract_tables()
+            elapsed = time.perf_counter() - start
+            observe_stage("extract_page", elapsed)
+            if page_seconds is not None:
+                page_seconds.append(elapsed)
+            print(f"\n--- Page {i + 1}: Found {len(tables)} table(s) ---")
+            page.close()  # Drop pdfplumber's cached layout objects for this page
+
+            if tables:
+                # Assume we want the first table on the page
+                table_part = tables[0]
+                print(f"Added {len(table_part)} rows from this page.")
+                yield from table_part
+    finally:
+        if layouts:
+            layouts.save()
+
+def get_full_table(doc, layouts=None):
     """
     Extracts tables from all pages and combines them into one list.
     """
-    all_rows = []
-    print(f"--- Processing {len(doc.pages)} pages ---")
-
-    for i, page in enumerate(doc.pages):
-        # extract_tables() is safer as it always returns a list
-        tables = page.extract_tables()
-        print(f"\n--- Page {i + 1}: Found {len(tables)} table(s) ---")
-
-        if tables:
-            # Assume we want the first table on the page
-            table_part = tables[0]
-            all_rows.extend(table_part)
-            print(f"Added {len(table_part)} rows from this page.")
-            
-    return all_rows
+    return list(iter_table_rows(doc, layouts=layouts))
+
+def clean_row(row):
+    return [cell for cell in row if cell is not None and cell.strip() != '']
+
+def scan_module_rows(rows):
+    """
+    One pass over the table rows, as a small state machine:
+
+        header  -> the first row holds the course code / name
+        seek    -> skip rows until the first 'Module:' row
+        modules -> collect module header rows and their description rows,
+                   gluing continuation rows (e.g. a description split over
+                   a page break) onto the previous description
+        end     -> stop at the first row after the modules (MODULE_SECTION_END)
+
+    Returns (cleaned header row or None if there were no rows at all,
+    merged module rows). Because it stops at
+    the end of the module section, later pages are never extracted.
+    """
+    header = None
+    merged_rows = []
+    state = "header"
+
+    for row in rows:
+        cleaned_row = clean_row(row)
+        if state == "header":
+            header = cleaned_row
+            state = "seek"
+            continue
+        if not cleaned_row:
+            continue
+
+        first_cell = cleaned_row[0]
+        if state == "seek":
+            if not first_cell.startswith('Module:'):
+                continue
+            state = "modules"
+
+        if first_cell.startswith('Module:'):
+            merged_rows.append(cleaned_row)
+        elif MODULE_SECTION_END.match(first_cell):
+            break  # state = "end"
+        elif merged_rows[-1][0].startswith('Module:'):
+            merged_rows.append(cleaned_row)  # Description row
+        else:
+            merged_rows[-1][0] += " " + first_cell  # Continuation row
+
+    return header, merged_rows
+
+def split_topics(desc_string):
+    """
+    Splits a module description into topics.
+    --- Smart Delimiter Logic ---
+    Uses dashes if the text has more dashes than commas, otherwise commas.
+    """
+    comma_count = desc_string.count(',')
+    dash_count = desc_string.count('-') + desc_string.count('–')
+
+    if dash_count > comma_count:
+        return [t.strip() for t in re.split(r'\s*-\s*|\s*–\s*', desc_string) if t.strip()]
+    return [t.strip() for t in desc_string.split(',') if t.strip()]
+
+def extract_syllabus(file_path):
+    """
+    The pure parsing stage: reads a syllabus PDF and returns a Syllabus,
+    without touching the DB. Safe to run in a worker process.
+
+    Returns None if no table data was found.
+    """
+    start = time.perf_counter()
+    with pdfplumber.open(file_path) as pdf:
+        observe_stage("open", time.perf_counter() - start)
+
+        page_seconds = []
+        rows = iter_table_rows(pdf, page_seconds)
+        start = time.perf_counter()
+        try:
+            cleaned_first_row, merged_rows = scan_module_rows(rows)
+        finally:
+            rows.close()
+        # Extraction runs lazily inside the scan; count only the merging here
+        observe_stage("merge", time.perf_counter() - start - sum(page_seconds))
+
+    if cleaned_first_row is None:
+        print("No table data found in the entire document.")
+        return None
+
+    start = time.perf_counter()
+    syllabus = build_syllabus(cleaned_first_row, merged_rows)
+    observe_stage("split", time.perf_counter() - start)
+    return syllabus
+
+def build_syllabus(cleaned_first_row, merged_rows):
+    """
+    Turns the header row and merged module rows from scan_module_rows()
+    into a Syllabus (module numbers, hours and split topic lists).
+    """
+    # --- 3. Parse Course Info (from stable table row) ---
+    course_code = cleaned_first_row[0] if len(cleaned_first_row) > 0 else "Unknown Code"
+    course_name = cleaned_first_row[1] if len(cleaned_first_row) > 1 else "Unknown Name"
+
+    print(f"\nProcessing: {course_code}: {course_name}")
+
+    # --- 6. Parse Topics per Module ---
+    modules = []
+    i = 0
+    while i < len(merged_rows):
+        row = merged_rows[i]
+
+        if row[0].startswith('Module:'):
+            # --- FIXED: Robust RegEx matching ---
+
+            # 1. Safely parse Module Number
+            mod_num_match = re.search(r'Module:(\d+)', row[0])
+            if not mod_num_match:
+                # Handle failure: Maybe log it or use a default
+                print(f"Warning: Could not parse module number from '{row[0]}'. Using 0.")
+                mod_num_str = "0"
+            else:
+                mod_num_str = mod_num_match.group(1)
+
+            mod_num = int(mod_num_str) if mod_num_str.isdigit() else 0
+            mod_name = row[1] # Assumes row[1] is always the name
+
+            # 2. Safely parse Module Hours (from row[2])
+            mod_hours_match = re.search(r'(\d+)', row[2]) # Made regex simpler
+            if not mod_hours_match:
+                # Handle failure: Use 0 if no number is found
+                print(f"Warning: Could not parse hours from '{row[2]}'. Using 0.")
+                mod_hours_str = "0"
+            else:
+                mod_hours_str = mod_hours_match.group(1)
+
+            mod_hours = int(mod_hours_str) if mod_hours_str.isdigit() else 0
+            # --- END OF FIX ---
+
+            module = ParsedModule(mod_num, f"Module:{mod_num} {mod_name}", mod_hours, [])
+            modules.append(module)
+
+            # Check for description row
+            if (i + 1) < len(merged_rows) and not merged_rows[i+1][0].startswith('Module:'):
+                desc_string = merged_rows[i+1][0].replace('\n', ' ')
+                module.topics = split_topics(desc_string)
+                i += 2 # Move past both header and description
+            else:
+                i += 1 # No topics, just skip header
+        else:
+            i += 1 # Safeguard
+
+    return Syllabus(course_code, course_name, modules)
 
 # --- THIS IS THE FUNCTION YOUR FLASK APP CALLS ---
-def parse_syllabus_pdf(file_path):
+def parse_syllabus_pdf(file_path, syllabus=None):
     """
     Runs the full table-parsing pipeline and inserts
     the data into the database according to the provided schema.
-    
+
+    Pass an already-parsed `syllabus` (e.g. from the upload cache) to
+    skip reading the PDF and go straight to the inserts.
+
     Called by the Flask /upload route.
     """
-    db = None
-    cursor = None
-    course_id = None # Initialize course_id
-    
+    if syllabus is None:
+        try:
+            syllabus = extract_syllabus(file_path)
+        except FileNotFoundError:
+            print(f"Error: The file '{file_path}' was not found.", file=sys.stderr)
+            return None
+        except Exception as e:
+            # Nothing was written yet
+            print(f"Could not parse '{file_path}': {e}", file=sys.stderr)
+            return None
+        if syllabus is None:
+            return None # Return None if parsing fails
+
+    # --- Return the course_id to Flask ---
     try:
-        # --- 1. Database Setup ---
-        db = get_db_connection()
-        cursor = db.cursor()
-        print("Database connection successful.")
-
-        # --- 2. Robust Table Parsing ---
-        with pdfplumber.open(file_path) as pdf:
-            
-            full_table = get_full_table(pdf)
-            
-            if not full_table:
-                print("No table data found in the entire document.")
-                return None # Return None if parsing fails
-
-            # --- 3. Parse Course Info (from stable table row) ---
-            first_row = full_table[0]
-            cleaned_first_row = [cell for cell in first_row 
-                                 if cell is not None and cell.strip() != '']
-            
-            course_code = cleaned_first_row[0] if len(cleaned_first_row) > 0 else "Unknown Code"
-            course_name = cleaned_first_row[1] if len(cleaned_first_row) > 1 else "Unknown Name"
-            
-            print(f"\nProcessing: {course_code}: {course_name}")
-
-            # --- 4. DB Insert: Course (Matches your schema) ---
-            cursor.execute("INSERT INTO Course (course_code, COURSE_NAME) VALUES (%s, %s)", 
-                           (course_code, course_name))
-            course_id = cursor.lastrowid
-            print(f"Inserted Course with ID: {course_id}")
-
-            # --- 5. Merge Module Rows ---
-            content_rows = full_table[10:25] # Your specified slice
-            merged_rows = []
-            for row in content_rows:
-                cleaned_row = [cell for cell in row 
-                               if cell is not None and cell.strip() != '']
-                if not cleaned_row:
-                    continue
-                if cleaned_row[0].startswith('Module:'):
-                    merged_rows.append(cleaned_row)
-                else:
-                    if not merged_rows or merged_rows[-1][0].startswith('Module:'):
-                        merged_rows.append(cleaned_row)
-                    else:
-                        continuation_text = " " + cleaned_row[0]
-                        merged_rows[-1][0] += continuation_text
-
-            # --- 6. Parse Topics & Insert Modules/Topics ---
-            i = 0
-            while i < len(merged_rows):
-                row = merged_rows[i]
-                
-                if row[0].startswith('Module:'):
-                    # --- FIXED: Robust RegEx matching ---
-                    
-                    # 1. Safely parse Module Number
-                    mod_num_match = re.search(r'Module:(\d+)', row[0])
-                    if not mod_num_match:
-                        # Handle failure: Maybe log it or use a default
-                        print(f"Warning: Could not parse module number from '{row[0]}'. Using 0.")
-                        mod_num_str = "0"
-                    else:
-                        mod_num_str = mod_num_match.group(1)
-
-                    mod_num = int(mod_num_str) if mod_num_str.isdigit() else 0
-                    mod_name = row[1] # Assumes row[1] is always the name
-
-                    # 2. Safely parse Module Hours (from row[2])
-                    mod_hours_match = re.search(r'(\d+)', row[2]) # Made regex simpler
-                    if not mod_hours_match:
-                        # Handle failure: Use 0 if no number is found
-                        print(f"Warning: Could not parse hours from '{row[2]}'. Using 0.")
-                        mod_hours_str = "0"
-                    else:
-                        mod_hours_str = mod_hours_match.group(1)
-
-                    mod_hours = int(mod_hours_str) if mod_hours_str.isdigit() else 0
-                    # --- END OF FIX ---
-                    
-                    full_module_name = f"Module:{mod_num} {mod_name}"
-
-                    # --- DB Insert: Module (Matches your schema) ---
-                    cursor.execute("INSERT INTO Module (course_id, module_number, Module_name, Module_hours) VALUES (%s, %s, %s, %s)",
-                                (course_id, mod_num, full_module_name, mod_hours))
-                    module_id = cursor.lastrowid
-
-                    # Check for description row
-                    if (i + 1) < len(merged_rows) and not merged_rows[i+1][0].startswith('Module:'):
-                        desc_string = merged_rows[i+1][0].replace('\n', ' ')
-                        
-                        # --- Smart Delimiter Logic ---
-                        comma_count = desc_string.count(',')
-                        dash_count = desc_string.count('-') + desc_string.count('–')
-                        
-                        topics_list = []
-                        if dash_count > comma_count:
-                            topics_list = [t.strip() for t in re.split(r'\s*-\s*|\s*–\s*', desc_string) if t.strip()]
-                        else:
-                            topics_list = [t.strip() for t in desc_string.split(',') if t.strip()]
-                        
-                        # --- DB Insert: Topics (Matches your schema) ---
-                        # --- DB Insert: Topics (Matches your schema image) ---
-                        default_importance = 0
-                        default_status = 0
-                        for topic in topics_list:
-                            # Wrap "completion status" in backticks
-                            cursor.execute(
-                                "INSERT INTO Topics (module_id, topic_name, importance, completion_status) VALUES (%s, %s, %s, %s)", 
-                                (module_id, topic, default_importance, default_status)
-                            )
-                        
-                        i += 2 # Move past both header and description
-                    else:
-                        i += 1 # No topics, just skip header
-                else:
-                    i += 1 # Safeguard
-            
-            # --- 7. Finalize Transaction ---
-            db.commit()
-            print(f"\n--- SUCCESS! ---")
-            print(f"Syllabus data for {course_code} saved to database.")
-            
-            # --- Return the course_id to Flask ---
-            return course_id
-
-    except FileNotFoundError:
-        print(f"Error: The file '{file_path}' was not found.", file=sys.stderr)
-        return None
+        return save_syllabus(syllabus)
     except Exception as e:
-        print(f"An unexpected error occurred: {e}", file=sys.stderr)
-        if db:
-            print("Rolling back database changes.")
-            db.rollback()
+        # save_syllabus() reports whether a transaction was rolled back
+        print(f"Could not save the syllabus: {e}", file=sys.stderr)
         return None # Return None on error
-    finally:
-        if cursor:
-            cursor.close()
-        if db:
-            db.close()
-            print("Database connection closed.")
\ No newline at end of file
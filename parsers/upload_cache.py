@@ -0,0 +1,110 @@
+"""
+Content-addressed storage for uploaded PDFs plus an LRU cache of parsed
+syllabi keyed by the file's SHA-256.
+
+Most students in a batch upload the exact same syllabus PDF. Files are
+stored as <sha256>.pdf (so same-named uploads no longer overwrite each
+other), and a repeat upload reuses the parsed structure instead of
+running pdfplumber again.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+CHUNK_SIZE = 64 * 1024
+
+CACHE_CONFIG = {
+    "max_entries": int(os.environ.get("PARSE_CACHE_SIZE", 128)),
+}
+
+
+def save_upload(stream, folder):
+    """
+    Streams an upload to disk while hashing it.
+    Returns (sha256 hex digest, path of the stored file).
+    """
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+
+        content_hash = digest.hexdigest()
+        path = os.path.join(folder, f"{content_hash}.pdf")
+        if os.path.exists(path):
+            os.remove(tmp_path)  # Same bytes are already stored
+        else:
+            os.replace(tmp_path, path)
+        return content_hash, path
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ParseCache:
+    """Thread-safe LRU of content hash -> parsed syllabus structure."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, content_hash):
+        with self._lock:
+            syllabus = self._entries.get(content_hash)
+            if syllabus is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(content_hash)
+            self._hits += 1
+            return syllabus
+
+    def put(self, content_hash, syllabus):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[content_hash] = syllabus
+            self._entries.move_to_end(content_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParseCache(**CACHE_CONFIG)
+    return _cache
@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# Read by the config dicts at import time, so set before any app module loads
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.gettempdir(), "syllabus-tests.db"))
+os.environ.setdefault("SECRET_KEY", "test")
+
+import io
+
+import pytest
+
+from db import backends, connection, migrations
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """A migrated SQLite database in tmp_path, used by get_db_connection()."""
+    monkeypatch.setattr(backends, "_backend", backends.SQLiteBackend(str(tmp_path / "syllabus.db")))
+    connection.close_pool()
+    with connection.get_db_connection() as db:
+        migrations.upgrade(db, out=io.StringIO())
+    yield backends.get_backend()
+    connection.close_pool()
@@ -0,0 +1,19 @@
+import json
+
+import pytest
+
+from db.backup import BackupFormatError, import_lines
+from db.connection import get_db_connection
+
+
+@pytest.mark.parametrize("version", ["one", [1], None])
+def test_import_rejects_a_malformed_format_version(sqlite_db, version):
+    lines = [json.dumps({"type": "export", "format": version}) + "\n"]
+    with get_db_connection() as db, pytest.raises(BackupFormatError) as info:
+        import_lines(db, lines)
+    assert info.value.line_number == 1
+
+
+def test_import_rejects_a_newer_format(sqlite_db):
+    with get_db_connection() as db, pytest.raises(BackupFormatError, match="newer"):
+        import_lines(db, [json.dumps({"type": "export", "format": 99})])
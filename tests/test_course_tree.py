@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from db.course_tree import load_course_tree
+
+SCHEMA = """
+    CREATE TABLE Course (course_id INTEGER PRIMARY KEY, course_name TEXT, course_code TEXT);
+    CREATE TABLE Module (
+        module_id INTEGER PRIMARY KEY, course_id INT, module_number INT, module_name TEXT, module_hours INT,
+        changed_version BIGINT NOT NULL DEFAULT 0
+    );
+    CREATE TABLE Topics (
+        topic_id INTEGER PRIMARY KEY, module_id INT, topic_name TEXT, completion_status INT, importance INT,
+        changed_version BIGINT NOT NULL DEFAULT 0
+    );
+"""
+
+
+class CountingCursor:
+    """A mysql.connector-style dictionary cursor over sqlite3 that records every query."""
+
+    def __init__(self, raw, queries):
+        self._cursor = raw.cursor()
+        self._queries = queries
+
+    def execute(self, sql, params=()):
+        self._queries.append(sql)
+        self._cursor.execute(sql.replace("%s", "?"), params)
+
+    def _row(self, row):
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._row(row)
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+class CountingConnection:
+    def __init__(self, raw):
+        self.raw = raw
+        self.queries = []
+
+    def cursor(self, dictionary=False):
+        return CountingCursor(self.raw, self.queries)
+
+
+@pytest.fixture
+def raw():
+    raw = sqlite3.connect(":memory:")
+    raw.executescript(SCHEMA)
+    yield raw
+    raw.close()
+
+
+def _course_with_modules(raw, modules, topics_per_module=3):
+    course_id = raw.execute("INSERT INTO Course (course_name, course_code) VALUES ('Graphs', 'CSE1001')").lastrowid
+    for m in range(modules):
+        module_id = raw.execute("INSERT INTO Module (course_id, module_number, module_name, module_hours) "
+                                "VALUES (?, ?, ?, 6)", (course_id, m + 1, f"Module {m}")).lastrowid
+        raw.executemany("INSERT INTO Topics (module_id, topic_name, completion_status, importance) VALUES (?, ?, 0, 1)",
+                        [(module_id, f"Topic {m}.{t}") for t in range(topics_per_module)])
+    return course_id
+
+
+@pytest.mark.parametrize("modules", [1, 25])
+def test_load_course_tree_runs_two_queries(raw, modules):
+    course_id = _course_with_modules(raw, modules)
+    db = CountingConnection(raw)
+    course, module_data = load_course_tree(db, course_id)
+
+    assert course["course_id"] == course_id
+    assert len(module_data) == modules
+    assert all(len(entry["topics"]) == 3 for entry in module_data)
+    assert len(db.queries) == 2
+
+
+def test_missing_course_stops_after_one_query(raw):
+    db = CountingConnection(raw)
+    assert load_course_tree(db, 404) == (None, [])
+    assert len(db.queries) == 1
@@ -0,0 +1,52 @@
+import multiprocessing
+
+import pdfplumber
+
+from benchmarks.synthetic_syllabus import write_syllabus_pdf
+from parsers.layout_templates import LayoutRegistry
+
+
+def _first_tables(path, registry):
+    with pdfplumber.open(path) as pdf:
+        return [registry.first_table(page) for page in pdf.pages]
+
+
+def test_known_layout_takes_the_fast_path_with_identical_rows(tmp_path):
+    path = str(tmp_path / "syllabus.pdf")
+    write_syllabus_pdf(path, modules=12, topics_per_module=12, pages=3)
+    with pdfplumber.open(path) as pdf:
+        expected = [tables[0] if tables else None for tables in (page.extract_tables() for page in pdf.pages)]
+
+    registry = LayoutRegistry()
+    assert _first_tables(path, registry) == expected  # Learns the layout
+    assert _first_tables(path, registry) == expected  # Fast path
+    registry.save()
+
+    stats = registry.stats()
+    assert stats["verified"] == stats["templates"] >= 1
+    assert stats["hits"] >= 1
+    assert stats["fallbacks"] == 0
+
+
+def _count_hits(path, fp, times):
+    registry = LayoutRegistry(path)
+    for _ in range(times):
+        registry._count(fp, hit=True)
+        registry.save()
+
+
+def test_concurrent_saves_keep_every_update(tmp_path):
+    path = str(tmp_path / "layout_templates.json")
+    seed = LayoutRegistry(path)
+    seed._new["abc"] = {"page_size": [595, 842], "columns": [40.0, 555.0], "verified": True,
+                        "hits": 0, "fallbacks": 0, "created": 0, "last_used": 0}
+    seed.save()
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_count_hits, args=(path, "abc", 50)) for _ in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert LayoutRegistry(path).stats()["hits"] == 300
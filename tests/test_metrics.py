@@ -0,0 +1,37 @@
+import pytest
+
+from app import create_app
+from monitoring import metrics
+
+
+def _requests_total(route, status):
+    prefix = f'http_requests_total{{method="GET",route="{route}",status="{status}"}} '
+    for line in metrics.render().splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+
+def test_unhandled_errors_are_counted_as_500(sqlite_db):
+    app = create_app({"TESTING": False})
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    before = _requests_total("/boom", 500)
+    assert app.test_client().get("/boom").status_code == 500
+    assert _requests_total("/boom", 500) == before + 1
+
+
+def test_unhandled_errors_are_counted_when_propagated(sqlite_db):
+    app = create_app({"TESTING": True})
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    before = _requests_total("/boom", 500)
+    with pytest.raises(RuntimeError):
+        app.test_client().get("/boom")
+    assert _requests_total("/boom", 500) == before + 1
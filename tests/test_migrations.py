@@ -0,0 +1,27 @@
+import io
+
+from db import backends, connection, migrations, rollups
+from db.schema import create_tables
+
+
+def test_upgrade_fills_rollups_for_existing_courses(tmp_path, monkeypatch):
+    # A database from before migrations: courses, modules and topics, no rollup tables
+    monkeypatch.setattr(backends, "_backend", backends.SQLiteBackend(str(tmp_path / "syllabus.db")))
+    connection.close_pool()
+    with connection.get_db_connection() as db, db.cursor() as cursor:
+        create_tables(cursor, ("Course", "Module", "Topics"))
+        cursor.execute("INSERT INTO Course (course_name, course_code) VALUES ('Networks', 'CSE3001')")
+        course_id = cursor.lastrowid
+        cursor.execute("INSERT INTO Module (course_id, module_number, module_name) VALUES (%s, 1, 'Layers')",
+                       (course_id,))
+        module_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO Topics (module_id, topic_name, completion_status) VALUES (%s, %s, %s)",
+                           [(module_id, "OSI", 40), (module_id, "TCP/IP", 100)])
+        db.commit()
+
+        migrations.upgrade(db, out=io.StringIO())
+
+        assert rollups.find_drift(cursor) == []
+        cursor.execute("SELECT topic_count, completion_sum FROM CourseProgress WHERE course_id = %s", (course_id,))
+        assert tuple(cursor.fetchone()) == (2, 140)
+    connection.close_pool()
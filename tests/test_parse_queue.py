@@ -0,0 +1,40 @@
+import io
+import threading
+
+import app as app_module
+from app import create_app
+from jobs import parse_queue
+from jobs.parse_queue import RUNNING, ParseQueue
+
+
+def test_running_job_reports_its_start(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_parse(path, syllabus=None):
+        started.set()
+        release.wait(5)
+        return None, None, 0.0, {}
+
+    monkeypatch.setattr(parse_queue, "_run_parse", slow_parse)
+    queue = ParseQueue(workers=1)
+    try:
+        job = queue.submit("syllabus.pdf")
+        assert started.wait(5)
+        status = queue.get(job.id)
+        assert status["status"] == RUNNING
+        assert status["started_at"] is not None
+        assert status["queue_seconds"] is not None
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_rejected_upload_leaves_no_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "get_parse_queue", lambda: ParseQueue(workers=1, max_pending=0))
+    client = create_app({"UPLOAD_FOLDER": str(tmp_path), "TESTING": True}).test_client()
+
+    response = client.post("/upload", data={"file": (io.BytesIO(b"%PDF-1.4 syllabus"), "syllabus.pdf")},
+                           headers={"Accept": "application/json"})
+
+    assert response.status_code == 429
+    assert list(tmp_path.iterdir()) == []
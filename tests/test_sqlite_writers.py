@@ -0,0 +1,44 @@
+import threading
+
+from db import mutations, rollups
+from db.connection import get_db_connection, init_pool
+
+THREADS = 16
+WRITES = 20
+
+
+def _write(fn, *args):
+    with get_db_connection() as db, db.cursor() as cursor:
+        result = fn(cursor, *args)
+        db.commit()
+        return result
+
+
+def test_concurrent_writers_queue_instead_of_failing(sqlite_db):
+    # Every mutation reads before it writes (module -> course, the topic's old completion)
+    init_pool(size=THREADS, max_overflow=0)
+    course_id = _write(mutations.add_course, "Data Structures", "CSE2001")["course_id"]
+    module_id = _write(mutations.add_module, course_id, "Trees")["module_id"]
+    topic_ids = [_write(mutations.add_topic, module_id, f"Topic {i}")["topic_id"] for i in range(THREADS)]
+
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(WRITES):
+                _write(mutations.update_topic_stats, topic_ids[n], (i * 5) % 101, 3)
+                _write(mutations.add_topic, module_id, f"Topic {n}.{i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with get_db_connection() as db, db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM Topics WHERE module_id = %s", (module_id,))
+        assert cursor.fetchone()[0] == THREADS * (WRITES + 1)
+        assert rollups.find_drift(cursor) == []
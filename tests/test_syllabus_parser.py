@@ -0,0 +1,22 @@
+from parsers import syllabus_parser
+from parsers.syllabus import ParsedModule, Syllabus
+
+
+def test_parse_failure_does_not_claim_a_rollback(tmp_path, capsys):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+
+    assert syllabus_parser.parse_syllabus_pdf(str(path)) is None
+    out = capsys.readouterr()
+    assert "Could not parse" in out.err
+    assert "rolled back" not in out.out
+
+
+def test_failed_insert_reports_the_rollback(sqlite_db, capsys):
+    # A NULL course code violates Course.course_code NOT NULL
+    syllabus = Syllabus(None, "Operating Systems", [ParsedModule(1, "Module:1 Processes", 4, ["Threads"])])
+
+    assert syllabus_parser.parse_syllabus_pdf("unused.pdf", syllabus) is None
+    out = capsys.readouterr()
+    assert "Database changes were rolled back." in out.out
+    assert "Could not save the syllabus" in out.err
@@ -0,0 +1,29 @@
+from db import mutations
+from db.connection import get_db_connection
+from db.write_behind import TopicStatsBuffer
+
+
+def test_failed_flush_keeps_the_database_base_completion(sqlite_db, monkeypatch):
+    with get_db_connection() as db, db.cursor() as cursor:
+        course_id = mutations.add_course(cursor, "Compilers", "CSE4001")["course_id"]
+        module_id = mutations.add_module(cursor, course_id, "Parsing")["module_id"]
+        topic_id = mutations.add_topic(cursor, module_id, "LR(1)")["topic_id"]
+        mutations.update_topic_stats(cursor, topic_id, 10, 1)
+        db.commit()
+
+    buffer = TopicStatsBuffer(enabled=True)
+    monkeypatch.setattr(buffer, "_start", lambda: None)
+    with get_db_connection() as db, db.cursor() as cursor:
+        buffer.put(cursor, topic_id, 50, 2)
+
+        def newer_write_then_fail(cursor, ops, overrides=None):
+            # Arrives while the flush is running, then the flush fails
+            with get_db_connection() as other, other.cursor() as other_cursor:
+                buffer.put(other_cursor, topic_id, 80, 3)
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(mutations, "apply_batch", newer_write_then_fail)
+        assert buffer.flush() == 0
+
+    entry = buffer._pending[topic_id]
+    assert (entry.base_completion, entry.completion) == (10, 80)
@@ -0,0 +1,10 @@
+"""
+Production entry point. Serve it with gunicorn, configured by gunicorn.conf.py:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Worker and thread counts come from WEB_WORKERS / WEB_THREADS.
+"""
+from app import create_app
+
+app = create_app()